@@ -0,0 +1,121 @@
+import math
+from referee.game.player import PlayerColor
+from referee.game.constants import MAX_TURNS
+from .t_board import TBoard, TURN_LIMIT_MODE_TURNS
+from .bitboard import NUM_CELLS, LINE_MASKS, completed_lines, lines_mask, mask_indices
+from .placements import Placement, NUM_PLACEMENTS, PLACEMENTS, CELL_PLACEMENTS, CELL_ADJ_PLACEMENTS
+
+# NumPy is optional, as the referee does not require it, and the search evaluates children one at a time without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BATCH_EVALUATION_AVAILABLE: bool = np != None
+
+def _pack_planes(planes: 'np.ndarray') -> 'np.ndarray':
+    """
+    Packs bitplanes of placements along their last axis into 64 bit words, 8 bits to a byte, least significant bit first.
+    """
+    return np.packbits(planes, axis=-1, bitorder='little').view(np.uint64)
+
+if BATCH_EVALUATION_AVAILABLE:
+    _cell_cover_planes: 'np.ndarray' = np.zeros((NUM_CELLS, NUM_PLACEMENTS), dtype=bool)
+    _cell_adj_planes: 'np.ndarray' = np.zeros((NUM_CELLS, NUM_PLACEMENTS), dtype=bool)
+    for cell_index in range(NUM_CELLS):
+        _cell_cover_planes[cell_index, list(CELL_PLACEMENTS[cell_index])] = True
+        _cell_adj_planes[cell_index, list(CELL_ADJ_PLACEMENTS[cell_index])] = True
+
+    _placement_overlap_planes: 'np.ndarray' = np.zeros((NUM_PLACEMENTS, NUM_PLACEMENTS), dtype=bool)
+    _placement_adj_planes: 'np.ndarray' = np.zeros((NUM_PLACEMENTS, NUM_PLACEMENTS), dtype=bool)
+    for placement in PLACEMENTS:
+        cell_indices: list[int] = list(mask_indices(placement.mask))
+        _placement_overlap_planes[placement.id] = _cell_cover_planes[cell_indices].any(axis=0)
+        _placement_adj_planes[placement.id] = _cell_adj_planes[cell_indices].any(axis=0)
+
+    # Packed bitplanes indexed by cell, of the placements covering the cell and of the placements it neighbours
+    CELL_COVER_PLANES: 'np.ndarray' = _pack_planes(_cell_cover_planes)
+    CELL_ADJ_PLANES: 'np.ndarray' = _pack_planes(_cell_adj_planes)
+    # Packed bitplanes indexed by placement, of the placements overlapping it and of the placements it neighbours
+    PLACEMENT_OVERLAP_PLANES: 'np.ndarray' = _pack_planes(_placement_overlap_planes)
+    PLACEMENT_ADJ_PLANES: 'np.ndarray' = _pack_planes(_placement_adj_planes)
+    # Every placement, without the padding bits of the last word
+    ALL_PLACEMENTS_PLANE: 'np.ndarray' = _pack_planes(np.ones(NUM_PLACEMENTS, dtype=bool))
+
+    BITWISE_COUNT_AVAILABLE: bool = hasattr(np, 'bitwise_count')
+    # Number of set bits of each byte value
+    BYTE_BIT_COUNTS: 'np.ndarray' = np.array([byte.bit_count() for byte in range(256)], dtype=np.uint8)
+
+def _cells_plane(planes: 'np.ndarray', mask: int) -> 'np.ndarray':
+    """
+    Placements in any of the planes of the cells in the mask.
+    """
+    return np.bitwise_or.reduce(planes[list(mask_indices(mask))], axis=0) if mask else np.zeros(planes.shape[1], dtype=np.uint64)
+
+def _plane_count(planes: 'np.ndarray') -> 'np.ndarray':
+    # np.bitwise_count was only added in NumPy 2.0, so earlier versions count the bits of each byte from a table
+    if BITWISE_COUNT_AVAILABLE:
+        return np.bitwise_count(planes).sum(axis=-1, dtype=np.int64)
+    return BYTE_BIT_COUNTS[np.ascontiguousarray(planes).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+def _playable_counts(player_board: int, opponent_board: int) -> tuple[int, int]:
+    free: np.ndarray = ~_cells_plane(CELL_COVER_PLANES, player_board | opponent_board) & ALL_PLACEMENTS_PLANE
+    return int(_plane_count(free & _cells_plane(CELL_ADJ_PLANES, player_board))), int(_plane_count(free & _cells_plane(CELL_ADJ_PLANES, opponent_board)))
+
+def child_scores(t_board: TBoard, player: PlayerColor, main_player: PlayerColor) -> tuple['np.ndarray', 'np.ndarray']:
+    """
+    Utilities for the main player, as TBoard.player_score gives them, of every position the player can reach with one
+    placement, returned along with the placement ids in ascending order. Without line clears, a placement only removes the
+    placements overlapping it from both players, and gives the player the free placements it neighbours which the player did
+    not already neighbour, so the number of placements each player has after every move is counted at once from bitplanes,
+    without applying the moves. The few moves which clear lines have their counts taken from the bitplanes of the cleared
+    board instead.
+    """
+    opponent: PlayerColor = player.opponent
+    player_board, opponent_board = t_board.player_boards[player], t_board.player_boards[opponent]
+    occupied: int = player_board | opponent_board
+
+    free: np.ndarray = ~_cells_plane(CELL_COVER_PLANES, occupied) & ALL_PLACEMENTS_PLANE
+    player_adj: np.ndarray = _cells_plane(CELL_ADJ_PLANES, player_board)
+    player_playable: np.ndarray = free & player_adj
+    opponent_playable: np.ndarray = free & _cells_plane(CELL_ADJ_PLANES, opponent_board)
+
+    placement_ids: np.ndarray = np.array(sorted(t_board.player_playable_tetrominos[player]), dtype=np.int64)
+    overlaps: np.ndarray = PLACEMENT_OVERLAP_PLANES[placement_ids]
+    gained: np.ndarray = PLACEMENT_ADJ_PLANES[placement_ids] & ~overlaps & (free & ~player_adj)
+
+    player_counts: np.ndarray = _plane_count(player_playable) - _plane_count(overlaps & player_playable) + _plane_count(gained)
+    opponent_counts: np.ndarray = _plane_count(opponent_playable) - _plane_count(overlaps & opponent_playable)
+    token_differences: np.ndarray = np.full(len(placement_ids), player_board.bit_count() + 4 - opponent_board.bit_count())
+
+    # A placement clears a line if it covers every empty cell of the line, which is only possible for lines missing at most 4
+    clearing: np.ndarray = np.zeros_like(player_playable)
+    for line_mask in LINE_MASKS:
+        missing_mask: int = line_mask & ~occupied
+        if 0 < missing_mask.bit_count() <= 4:
+            clearing |= np.bitwise_and.reduce(CELL_COVER_PLANES[list(mask_indices(missing_mask))], axis=0)
+
+    clearing_ids: np.ndarray = np.flatnonzero(np.unpackbits((clearing & player_playable).view(np.uint8), bitorder='little'))
+    for i in np.searchsorted(placement_ids, clearing_ids).tolist():
+        placement: Placement = PLACEMENTS[int(placement_ids[i])]
+        placement_mask: int = placement.mask
+        removed_mask: int = lines_mask(*completed_lines(occupied | placement_mask, placement.rows, placement.cols))
+        cleared_player_board, cleared_opponent_board = (player_board | placement_mask) & ~removed_mask, opponent_board & ~removed_mask
+
+        player_counts[i], opponent_counts[i] = _playable_counts(cleared_player_board, cleared_opponent_board)
+        token_differences[i] = cleared_player_board.bit_count() - cleared_opponent_board.bit_count()
+
+    # Counts and token differences are from the player's perspective, while utilities are for the main player
+    sign: int = 1 if player == main_player else -1
+
+    turn_count: int = t_board.turn_count + 1
+    if turn_count == MAX_TURNS:
+        # The turn limit ends the game before either player's lack of moves is considered
+        return placement_ids, np.select([token_differences * sign > 0, token_differences * sign < 0], [math.inf, -math.inf], 0.0)
+
+    scores: np.ndarray = (token_differences if turn_count >= MAX_TURNS - TURN_LIMIT_MODE_TURNS else player_counts - opponent_counts).astype(float) * sign
+    scores[player_counts == 0] = -sign * math.inf
+    # The opponent moves next, so loses if they cannot place, even if the player could not either
+    scores[opponent_counts == 0] = sign * math.inf
+
+    return placement_ids, scores
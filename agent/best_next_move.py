@@ -1,7 +1,72 @@
-from referee.game.constants import BOARD_N
+import math
+import time
+from typing import Callable
+from referee.game.constants import BOARD_N, MAX_TURNS
 from referee.game import PlayerColor
-from .t_board import TBoard
+from .t_board import TBoard, PlacementUndo
 from .tetromino import Tetromino
+from .transposition_table import TranspositionTable, SharedTranspositionTable, TTEntry, BoundType
+from .search_context import SearchContext, SearchAlgorithm
+from .search_stats import SearchStats
+from .move_history import MoveHistory
+from .batch_evaluation import BATCH_EVALUATION_AVAILABLE, child_scores
+from .symmetry import Symmetry, canonical_position_key, inverse_symmetry, transform_placement, remove_symmetric_placements
+
+# Evaluations are integers, so a window this wide contains no possible value other than its bounds
+NULL_WINDOW: float = 1
+
+# Moves from this index on in the ordering are searched to a reduced depth first, where the remaining depth allows
+LATE_MOVE_MIN_INDEX: int = 4
+LATE_MOVE_MIN_DEPTH: int = 3
+LATE_MOVE_REDUCTION: int = 1
+
+# The null move is searched this much shallower than a real move would be
+NULL_MOVE_REDUCTION: int = 2
+NULL_MOVE_MIN_DEPTH: int = 3
+
+# Moves leaving the opponent at most this many replies are forcing, and are searched a ply deeper, up to this many times
+# along any one line
+THREAT_MAX_REPLIES: int = 2
+MAX_THREAT_EXTENSIONS: int = 2
+
+# Line clears are played out past the horizon for at most this many plies
+QUIESCENCE_MAX_PLIES: int = 2
+
+def position_key(t_board: TBoard, player: PlayerColor) -> tuple[int, Symmetry, list[Symmetry]]:
+    """
+    Transposition table key of a node, along with the symmetry mapping the position onto the frame its entry is stored in,
+    and the symmetries of the position. Every node is keyed by its canonical form, whatever depth it is searched to, so an
+    entry is found again by the next iteration's deeper search of the same position.
+    """
+    return canonical_position_key(t_board.player_boards, t_board.turn_count, player)
+
+def principal_variation(t_board: TBoard, player: PlayerColor, context: SearchContext, depth: int) -> list[Tetromino]:
+    """
+    Follows the best moves stored in the transposition table from the position, which was searched to the given depth,
+    returning the sequence of moves expected to be played.
+    """
+    variation: list[Tetromino] = []
+    undos: list[PlacementUndo] = []
+
+    while depth > 0 and context.transposition_table != None:
+        key, symmetry, _ = position_key(t_board, player)
+        entry: TTEntry | None = context.transposition_table.probe(key)
+        if entry == None or entry[4] == None:
+            break
+
+        placement_id: int = transform_placement(entry[4], inverse_symmetry(symmetry))
+        if placement_id not in t_board.player_playable_tetrominos[player]:
+            break
+
+        tetromino: Tetromino = Tetromino.from_placement(placement_id)
+        variation.append(tetromino)
+        undos.append(t_board.apply(tetromino, player))
+        player, depth = player.opponent, depth - 1
+
+    for undo in reversed(undos):
+        t_board.undo(undo)
+
+    return variation
 
 def best_next_move(
     t_board: TBoard,
@@ -10,48 +75,414 @@ def best_next_move(
     alpha: float,
     beta: float,
     depth: int,
+    context: SearchContext | None = None,
 ) -> tuple[float, Tetromino | None]:
     """
     Utilizes the minimax algorithm with alpha-beta pruning and a depth limit, to identify the move by the current player,
-    at the current board state, which leads to a maximized utility. 
+    at the current board state, which leads to a maximized utility. The board is searched in place through apply and undo,
+    and is left unchanged on return, unless the context's deadline passes and SearchTimeout is raised. Moves leading to the
+    same position as an earlier move, or to a symmetric one, are skipped, and the context's options select the rest of the
+    search's enhancements.
     """
+    stats: SearchStats | None = context.stats if context != None else None
+    if stats != None:
+        stats.nodes += 1
+
     num_playable_tetrominos: int = t_board.num_playable_tetrorminos(player)
-    playable_tetrominos: list[Tetromino] = t_board.playable_tetrominos(player, sort=True, remove_similar = True)
 
+    if depth == 0 or t_board.max_turn_reached() or not num_playable_tetrominos:
+        # Reached max depth, terminal state, or a state where the current player can't make any moves.
+        if stats != None:
+            phase_start_time = time.perf_counter()
+
+        if depth == 0 and context != None and context.quiescence:
+            score: float = _quiescence_search(t_board, player, main_player, alpha, beta, QUIESCENCE_MAX_PLIES, context)
+        else:
+            score: float = _evaluate(t_board, player, main_player, context)
+
+        if stats != None:
+            stats.evaluation_time += time.perf_counter() - phase_start_time
+        return score, None
+
+    if context != None:
+        context.check_deadline()
+
+    transposition_table: TranspositionTable | SharedTranspositionTable | None = context.transposition_table if context != None else None
+    # A root restricted to some of its moves has a different value to the position's, so it is kept out of the table
+    root_placement_ids: set[int] | None = context.root_placement_ids if context != None and context.ply == 0 else None
+    if root_placement_ids != None:
+        transposition_table = None
+    move_history: MoveHistory | None = context.move_history if context != None else None
+    if stats != None:
+        stats.interior_nodes += 1
+
+    # Moves leaving the opponent no placements win outright, unless the turn limit ends the game first. Nodes one ply from the
+    # horizon find them anyway, as they score every child.
+    if depth >= 2 and t_board.turn_count + 1 < MAX_TURNS:
+        blocking_tetrominos: list[Tetromino] = t_board.blocking_tetrominos(player)
+        if root_placement_ids != None:
+            blocking_tetrominos = [tetromino for tetromino in blocking_tetrominos if tetromino.placement_id in root_placement_ids]
+        if blocking_tetrominos:
+            if stats != None:
+                stats.immediate_wins += 1
+            return float('inf') if player == main_player else float('-inf'), blocking_tetrominos[0]
+
+    if depth == 1 and root_placement_ids == None and context != None and context.batch_evaluation and not context.territory_evaluation and not context.quiescence and not context.threat_extensions and BATCH_EVALUATION_AVAILABLE:
+        return _evaluate_leaf_parent(t_board, player, main_player, alpha, beta, context)
+
+    # The table is probed before the moves are generated, so a cutoff skips generating and ordering them
+    key, symmetry, position_symmetries = position_key(t_board, player)
+    alpha_original, beta_original = alpha, beta
+    hash_move: Tetromino | None = None
+
+    if transposition_table != None:
+        entry: TTEntry | None = transposition_table.probe(key)
+        if stats != None:
+            stats.tt_probes += 1
+            stats.tt_hits += entry != None
+
+        if entry != None:
+            _, entry_depth, bound_type, value, best_placement_id = entry
+            if best_placement_id != None:
+                # Entries store the best move in the canonical position's frame
+                best_placement_id = transform_placement(best_placement_id, inverse_symmetry(symmetry))
+                # An entry written by a position whose key collides with this one's may hold a move which is illegal here
+                if best_placement_id in t_board.player_playable_tetrominos[player]:
+                    hash_move = Tetromino.from_placement(best_placement_id)
+
+            if entry_depth >= depth and hash_move != None and (
+                bound_type == BoundType.EXACT
+                or (bound_type == BoundType.LOWER and value >= beta)
+                or (bound_type == BoundType.UPPER and value <= alpha)
+            ):
+                return value, hash_move
+
+    if stats != None:
+        phase_start_time: float = time.perf_counter()
 
-    if depth == 0 or t_board.max_turn_reached() or not playable_tetrominos: 
-        # Reached max depth, terminal state, or a state where the current player can't make any moves. 
-        return t_board.player_score(main_player), None 
-    
-    if (player == main_player): # Maximizing 
+    ordering_bonus: Callable[[Tetromino], float] | None = move_history.ordering_bonus(context.ply) if move_history != None else None
+    remove_similar: bool = context != None and context.remove_similar
+    playable_tetrominos: list[Tetromino] = t_board.playable_tetrominos(
+        player, sort=True, remove_similar=remove_similar, remove_equivalent=root_placement_ids == None, ordering_bonus=ordering_bonus
+    )
+
+    if stats != None:
+        stats.ordering_time += time.perf_counter() - phase_start_time
+
+    if root_placement_ids != None:
+        # Equivalent moves are only skipped within the whole set of moves, as which of them is kept depends on the ordering,
+        # which differs between the workers sharing out the root
+        playable_tetrominos = [tetromino for tetromino in playable_tetrominos if tetromino.placement_id in root_placement_ids]
+    elif len(position_symmetries) > 1:
+        unique_placement_ids: list[int] = remove_symmetric_placements([tetromino.placement_id for tetromino in playable_tetrominos], position_symmetries)
+        playable_tetrominos = list(map(Tetromino.from_placement, unique_placement_ids))
+
+    if hash_move != None:
+        # Search the previously best move first
+        playable_tetrominos = [hash_move] + [tetromino for tetromino in playable_tetrominos if tetromino != hash_move]
+
+    null_move_utility: float | None = _null_move_search(t_board, player, main_player, alpha, beta, depth, context)
+    if null_move_utility != None:
+        return null_move_utility, None
+
+    principal_variation_search: bool = context != None and context.algorithm == SearchAlgorithm.PRINCIPAL_VARIATION
+
+    if (player == main_player): # Maximizing
         max_utility: float = float('-inf')
-        max_utility_move: Tetromino | None = None 
+        max_utility_move: Tetromino | None = None
+
+        for i, tetromino in enumerate(playable_tetrominos):
+            reduction: int = _late_move_reduction(t_board, context, i, depth, alpha)
+            if reduction:
+                utility: float = _search_child(t_board, tetromino, player, main_player, alpha, alpha + NULL_WINDOW, depth, context, reduction)
+                if utility > alpha:
+                    _record_re_search(context)
 
-        for tetromino in playable_tetrominos:
-            utility, _ = best_next_move(t_board.place_tetromino(tetromino, player), player.opponent, main_player, alpha, beta, depth - 1)
-            
-            if utility >= max_utility:
+            if not reduction or utility > alpha:
+                # A null window at an infinite bound holds no value, so the move is searched with the full window
+                if i > 0 and principal_variation_search and not math.isinf(alpha):
+                    utility: float = _search_child(t_board, tetromino, player, main_player, alpha, alpha + NULL_WINDOW, depth, context)
+                    if alpha < utility < beta:
+                        _record_re_search(context)
+                        utility = _search_child(t_board, tetromino, player, main_player, alpha, beta, depth, context)
+                else:
+                    utility: float = _search_child(t_board, tetromino, player, main_player, alpha, beta, depth, context)
+
+            # A later move's utility may only be a bound, so it replaces the best move only when strictly better
+            if utility > max_utility or max_utility_move == None:
                 max_utility, max_utility_move = utility, tetromino
 
             if max_utility >= beta:
-                return max_utility, max_utility_move
+                _record_cutoff(context, tetromino, i, depth)
+                break
 
             alpha = max(max_utility, alpha)
 
-        return max_utility, max_utility_move
-    else: # Minimizing  
+        best_utility, best_move = max_utility, max_utility_move
+    else: # Minimizing
         min_utility = float('inf')
         min_utility_move: Tetromino | None = None
 
-        for tetromino in playable_tetrominos:
-            utility, _ = best_next_move(t_board.place_tetromino(tetromino, player), player.opponent, main_player, alpha, beta, depth - 1)
+        for i, tetromino in enumerate(playable_tetrominos):
+            reduction: int = _late_move_reduction(t_board, context, i, depth, beta)
+            if reduction:
+                utility: float = _search_child(t_board, tetromino, player, main_player, beta - NULL_WINDOW, beta, depth, context, reduction)
+                if utility < beta:
+                    _record_re_search(context)
+
+            if not reduction or utility < beta:
+                if i > 0 and principal_variation_search and not math.isinf(beta):
+                    utility: float = _search_child(t_board, tetromino, player, main_player, beta - NULL_WINDOW, beta, depth, context)
+                    if alpha < utility < beta:
+                        _record_re_search(context)
+                        utility = _search_child(t_board, tetromino, player, main_player, alpha, beta, depth, context)
+                else:
+                    utility: float = _search_child(t_board, tetromino, player, main_player, alpha, beta, depth, context)
 
-            if utility <= min_utility:
+            if utility < min_utility or min_utility_move == None:
                 min_utility, min_utility_move = utility, tetromino
 
             if min_utility <= alpha:
-                return min_utility, min_utility_move
-            
+                _record_cutoff(context, tetromino, i, depth)
+                break
+
             beta = min(min_utility, beta)
-            
-        return min_utility, min_utility_move
\ No newline at end of file
+
+        best_utility, best_move = min_utility, min_utility_move
+
+    if transposition_table != None:
+        bound_type: BoundType = BoundType.UPPER if best_utility <= alpha_original else BoundType.LOWER if best_utility >= beta_original else BoundType.EXACT
+        transposition_table.store(key, depth, bound_type, best_utility, transform_placement(best_move.placement_id, symmetry) if best_move != None else None)
+        if stats != None:
+            stats.tt_stores += 1
+
+    return best_utility, best_move
+
+def _evaluate(t_board: TBoard, player: PlayerColor, main_player: PlayerColor, context: SearchContext | None) -> float:
+    """
+    Static utility of the position for the main player, with the player to move.
+    """
+    if not t_board.player_playable_tetrominos[player] and not t_board.max_turn_reached():
+        # The player to move cannot place, so loses even if their opponent could not either
+        return float('-inf') if player == main_player else float('inf')
+
+    score: float = t_board.player_score(main_player)
+    if context != None and context.territory_evaluation and not math.isinf(score) and not t_board.turn_limit_mode():
+        score += t_board.territory_score(main_player)
+
+    return score
+
+def _quiescence_search(
+    t_board: TBoard,
+    player: PlayerColor,
+    main_player: PlayerColor,
+    alpha: float,
+    beta: float,
+    plies: int,
+    context: SearchContext,
+) -> float:
+    """
+    Utility of a leaf once the line clears available from it have been played out, for up to the given number of plies. A
+    clear swings both mobility and tokens, so scoring the position just before one misjudges it. The player to move need not
+    clear a line, so they may stand on the position's static utility, and only the moves completing a line are searched,
+    with alpha-beta pruning, to see if they improve on it.
+    """
+    if context.stats != None:
+        context.stats.quiescence_nodes += 1
+
+    stand_pat: float = _evaluate(t_board, player, main_player, context)
+    if plies == 0 or math.isinf(stand_pat) or t_board.max_turn_reached():
+        return stand_pat
+
+    maximizing: bool = player == main_player
+    best_utility: float = stand_pat
+    if maximizing:
+        if best_utility >= beta:
+            return best_utility
+        alpha = max(alpha, best_utility)
+    else:
+        if best_utility <= alpha:
+            return best_utility
+        beta = min(beta, best_utility)
+
+    for tetromino in t_board.clearing_tetrominos(player):
+        undo: PlacementUndo = t_board.apply(tetromino, player)
+        utility: float = _quiescence_search(t_board, player.opponent, main_player, alpha, beta, plies - 1, context)
+        t_board.undo(undo)
+
+        if maximizing:
+            best_utility = max(best_utility, utility)
+            if best_utility >= beta:
+                break
+            alpha = max(alpha, best_utility)
+        else:
+            best_utility = min(best_utility, utility)
+            if best_utility <= alpha:
+                break
+            beta = min(beta, best_utility)
+
+    return best_utility
+
+def _search_child(
+    t_board: TBoard,
+    tetromino: Tetromino,
+    player: PlayerColor,
+    main_player: PlayerColor,
+    alpha: float,
+    beta: float,
+    depth: int,
+    context: SearchContext | None,
+    reduction: int = 0,
+) -> float:
+    """
+    Searches the position after the player places the tetromino, to one less than the given depth, less the reduction.
+    """
+    stats: SearchStats | None = context.stats if context != None else None
+    if stats != None:
+        phase_start_time: float = time.perf_counter()
+
+    undo: PlacementUndo = t_board.apply(tetromino, player)
+
+    if stats != None:
+        stats.move_generation_time += time.perf_counter() - phase_start_time
+
+    extension: int = _threat_extension(t_board, player, context)
+    if context != None:
+        context.ply += 1
+        context.extension_plies += extension
+
+    utility, _ = best_next_move(t_board, player.opponent, main_player, alpha, beta, depth - 1 - reduction + extension, context)
+
+    if context != None:
+        context.ply -= 1
+        context.extension_plies -= extension
+
+    if stats != None:
+        phase_start_time = time.perf_counter()
+
+    t_board.undo(undo)
+
+    if stats != None:
+        stats.move_generation_time += time.perf_counter() - phase_start_time
+    return utility
+
+def _evaluate_leaf_parent(
+    t_board: TBoard,
+    player: PlayerColor,
+    main_player: PlayerColor,
+    alpha: float,
+    beta: float,
+    context: SearchContext,
+) -> tuple[float, Tetromino]:
+    """
+    Searches a node one ply from the horizon by scoring all of its children in a batch. Every child is scored, so the node's
+    exact utility is found and stored, while the best move is still recorded in the move history if it causes a cutoff.
+    """
+    stats: SearchStats | None = context.stats
+    if stats != None:
+        phase_start_time: float = time.perf_counter()
+
+    placement_ids, scores = child_scores(t_board, player, main_player)
+    maximizing: bool = player == main_player
+    # Ties go to the lowest placement id, as the children are not ordered
+    best_index: int = int(scores.argmax() if maximizing else scores.argmin())
+    best_utility: float = float(scores[best_index])
+    if not math.isinf(best_utility):
+        # Kept integral like the scalar evaluation, as null windows rely on utilities being integers
+        best_utility = int(best_utility)
+    best_move: Tetromino = Tetromino.from_placement(int(placement_ids[best_index]))
+
+    if stats != None:
+        stats.nodes += len(placement_ids)
+        stats.evaluation_time += time.perf_counter() - phase_start_time
+
+    if context.move_history != None and (best_utility >= beta if maximizing else best_utility <= alpha):
+        context.move_history.record_cutoff(best_move, context.ply, 1)
+
+    if context.transposition_table != None:
+        key, symmetry, _ = position_key(t_board, player)
+        context.transposition_table.store(key, 1, BoundType.EXACT, best_utility, transform_placement(best_move.placement_id, symmetry))
+        if stats != None:
+            stats.tt_stores += 1
+
+    return best_utility, best_move
+
+def _threat_extension(t_board: TBoard, player: PlayerColor, context: SearchContext | None) -> int:
+    # Read after the player's move is applied, from the replies it leaves the opponent
+    if context == None or not context.threat_extensions or context.extension_plies >= MAX_THREAT_EXTENSIONS:
+        return 0
+
+    if 0 < t_board.num_playable_tetrorminos(player.opponent) <= THREAT_MAX_REPLIES:
+        if context.stats != None:
+            context.stats.threat_extensions += 1
+        return 1
+
+    return 0
+
+def _late_move_reduction(t_board: TBoard, context: SearchContext | None, move_index: int, depth: int, bound: float) -> int:
+    # Near the turn limit the search is meant to reach it, so nothing is pruned unsoundly. The reduced search probes the
+    # bound the player must improve on with a null window, which holds no value while that bound is infinite.
+    if context == None or not context.late_move_reductions or move_index < LATE_MOVE_MIN_INDEX or depth < LATE_MOVE_MIN_DEPTH or t_board.turn_limit_mode():
+        return 0
+    if math.isinf(bound):
+        return 0
+
+    if context.stats != None:
+        context.stats.reduced_searches += 1
+    return LATE_MOVE_REDUCTION
+
+def _null_move_search(
+    t_board: TBoard,
+    player: PlayerColor,
+    main_player: PlayerColor,
+    alpha: float,
+    beta: float,
+    depth: int,
+    context: SearchContext | None,
+) -> float | None:
+    """
+    Lets the player pass, which is not a legal action, and searches the opponent's reply to a reduced depth with a null window
+    at the bound the player is trying to reach. If the player reaches it even after passing, the opponent is already squeezed,
+    which is verified by searching the player's real moves to the same reduced depth. Returns the utility if both searches
+    reach the bound, and the node can be cut off, otherwise None.
+    """
+    if context == None or not context.null_move_pruning or context.null_move_searching or context.ply == 0 or depth < NULL_MOVE_MIN_DEPTH:
+        return None
+    if t_board.turn_limit_mode():
+        # Near the turn limit the search is meant to reach it, so nothing is pruned unsoundly
+        return None
+
+    maximizing: bool = player == main_player
+    if math.isinf(beta if maximizing else alpha):
+        return None
+    null_alpha, null_beta = (beta - NULL_WINDOW, beta) if maximizing else (alpha, alpha + NULL_WINDOW)
+
+    context.null_move_searching = True
+    context.ply += 1
+    utility, _ = best_next_move(t_board, player.opponent, main_player, null_alpha, null_beta, depth - 1 - NULL_MOVE_REDUCTION, context)
+    context.ply -= 1
+
+    if (utility >= beta) if maximizing else (utility <= alpha):
+        _record_re_search(context)
+        utility, _ = best_next_move(t_board, player, main_player, null_alpha, null_beta, depth - NULL_MOVE_REDUCTION, context)
+    context.null_move_searching = False
+
+    if not ((utility >= beta) if maximizing else (utility <= alpha)):
+        return None
+
+    if context.stats != None:
+        context.stats.null_move_cutoffs += 1
+    return utility
+
+def _record_cutoff(context: SearchContext | None, tetromino: Tetromino, move_index: int, depth: int) -> None:
+    if context == None:
+        return
+
+    if context.stats != None:
+        context.stats.record_cutoff(move_index)
+    if context.move_history != None:
+        context.move_history.record_cutoff(tetromino, context.ply, depth)
+
+def _record_re_search(context: SearchContext) -> None:
+    if context.stats != None:
+        context.stats.re_searches += 1
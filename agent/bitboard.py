@@ -0,0 +1,72 @@
+from referee.game.constants import BOARD_N
+from referee.game.coord import Coord
+
+# A set of board cells is represented as a single int, where the cell at (row, col) is bit row * BOARD_N + col.
+
+NUM_CELLS: int = BOARD_N * BOARD_N
+FULL_MASK: int = (1 << NUM_CELLS) - 1
+
+ROW_MASKS: list[int] = [((1 << BOARD_N) - 1) << (row * BOARD_N) for row in range(BOARD_N)]
+COL_MASKS: list[int] = [sum(1 << (row * BOARD_N + col) for row in range(BOARD_N)) for col in range(BOARD_N)]
+LINE_MASKS: list[int] = ROW_MASKS + COL_MASKS
+
+_NOT_FIRST_COL_MASK: int = FULL_MASK & ~COL_MASKS[0]
+_NOT_LAST_COL_MASK: int = FULL_MASK & ~COL_MASKS[BOARD_N - 1]
+_ROW_SHIFT: int = NUM_CELLS - BOARD_N
+
+def coord_index(coord: Coord) -> int:
+    return coord.r * BOARD_N + coord.c
+
+def coord_mask(coord: Coord) -> int:
+    return 1 << (coord.r * BOARD_N + coord.c)
+
+def coords_mask(coords: list[Coord]) -> int:
+    mask: int = 0
+    for coord in coords:
+        mask |= 1 << (coord.r * BOARD_N + coord.c)
+
+    return mask
+
+def index_coord(index: int) -> Coord:
+    return Coord(index // BOARD_N, index % BOARD_N)
+
+def mask_indices(mask: int) -> list[int]:
+    indices: list[int] = []
+    while mask:
+        low_bit: int = mask & -mask
+        indices.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+
+    return indices
+
+def mask_coords(mask: int) -> list[Coord]:
+    return [index_coord(index) for index in mask_indices(mask)]
+
+def adjacent_mask(mask: int) -> int:
+    """
+    Cells orthogonally adjacent to any cell in the mask, wrapping around the board edges. May include cells of the mask itself.
+    """
+    down: int = ((mask << BOARD_N) | (mask >> _ROW_SHIFT)) & FULL_MASK
+    up: int = (mask >> BOARD_N) | ((mask << _ROW_SHIFT) & FULL_MASK)
+    right: int = ((mask << 1) & _NOT_FIRST_COL_MASK) | ((mask & COL_MASKS[BOARD_N - 1]) >> (BOARD_N - 1))
+    left: int = ((mask >> 1) & _NOT_LAST_COL_MASK) | ((mask & COL_MASKS[0]) << (BOARD_N - 1))
+
+    return down | up | right | left
+
+def completed_lines(occupied: int, rows: tuple[int, ...], cols: tuple[int, ...]) -> tuple[list[int], list[int]]:
+    """
+    Rows and cols, among those given, which are entirely occupied. A placement's rows and cols are precomputed on it.
+    """
+    completed_rows: list[int] = [row for row in rows if occupied & ROW_MASKS[row] == ROW_MASKS[row]]
+    completed_cols: list[int] = [col for col in cols if occupied & COL_MASKS[col] == COL_MASKS[col]]
+
+    return completed_rows, completed_cols
+
+def lines_mask(rows: list[int], cols: list[int]) -> int:
+    mask: int = 0
+    for row in rows:
+        mask |= ROW_MASKS[row]
+    for col in cols:
+        mask |= COL_MASKS[col]
+
+    return mask
@@ -0,0 +1,150 @@
+import time
+from referee.game.constants import MAX_TURNS
+from referee.game.player import PlayerColor
+from .t_board import TBoard, PlacementUndo
+from .tetromino import Tetromino
+from .search_context import SearchTimeout
+from .zobrist import PLAYER_TO_MOVE_KEYS
+
+# Game outcomes from the perspective of the player to move
+WIN: int = 1
+DRAW: int = 0
+LOSS: int = -1
+
+# The solver is tried once both players together have at most this many playable tetrominos
+ENDGAME_MOBILITY_THRESHOLD: int = 24
+# Solved positions are forgotten once the cache holds this many, as it is never trimmed otherwise
+MAX_CACHE_ENTRIES: int = 1 << 20
+
+# Bounds on the outcome of a position, from the perspective of the player to move
+CacheEntry = tuple[int, int]
+
+class EndgameSolver:
+    """
+    Exact solver of the game's outcome, searching to increasing depths until the outcome is proven. Each depth is searched
+    twice with alpha-beta, once counting unfinished games at the horizon as losses for the player to move and once as wins,
+    which bounds the true outcome from below and above. The position is solved once the bounds meet. The bounds proven for
+    each position are cached by its Zobrist hash and the player to move, across depths and solves, as a position's outcome
+    never changes. Moves leaving the opponent the fewest replies are searched first, as they tend to end the game soonest.
+    """
+    def __init__(self):
+        self.cache: dict[int, CacheEntry] = {}
+        self.deadline: float | None = None
+        self.nodes: int = 0
+
+    def solve(self, t_board: TBoard, player: PlayerColor, time_budget: float) -> tuple[int, Tetromino] | None:
+        """
+        Returns the outcome of the position for the player to move, along with a move achieving it, or None if the position
+        was not solved within the time budget. The position must not already be over.
+        """
+        self.deadline = time.process_time() + time_budget
+        # The solve is abandoned part-way through when the deadline passes, so it is done on a copy of the board
+        search_board: TBoard = t_board.copy()
+
+        try:
+            for depth in range(1, MAX_TURNS - t_board.turn_count + 1):
+                lower, move = self.__search_root(search_board, player, depth, LOSS)
+                if lower == WIN:
+                    return lower, move
+
+                upper, _ = self.__search_root(search_board, player, depth, WIN)
+                if upper == lower:
+                    return lower, move
+        except SearchTimeout:
+            return None
+        finally:
+            self.deadline = None
+
+        return None
+
+    def __search_root(self, t_board: TBoard, player: PlayerColor, depth: int, horizon: int) -> tuple[int, Tetromino]:
+        best_outcome: int = LOSS - 1
+        best_move: Tetromino | None = None
+
+        for tetromino in self.__ordered_moves(t_board, player):
+            undo: PlacementUndo = t_board.apply(tetromino, player)
+            outcome: int = -self.__negamax(t_board, player.opponent, LOSS, -max(best_outcome, LOSS), depth - 1, -horizon)
+            t_board.undo(undo)
+
+            if outcome > best_outcome:
+                best_outcome, best_move = outcome, tetromino
+            if best_outcome == WIN:
+                break
+
+        return best_outcome, best_move
+
+    def __negamax(self, t_board: TBoard, player: PlayerColor, alpha: int, beta: int, depth: int, horizon: int) -> int:
+        """
+        Outcome of the position for the player to move, counting unfinished games at the given depth as the horizon outcome.
+        """
+        self.nodes += 1
+
+        if t_board.max_turn_reached():
+            player_tokens: int = t_board.player_boards[player].bit_count()
+            opponent_tokens: int = t_board.player_boards[player.opponent].bit_count()
+            return WIN if player_tokens > opponent_tokens else LOSS if player_tokens < opponent_tokens else DRAW
+        elif not t_board.player_playable_tetrominos[player]:
+            return LOSS
+
+        key: int = t_board.zobrist_hash ^ PLAYER_TO_MOVE_KEYS[player]
+        lower, upper = self.cache.get(key, (LOSS, WIN))
+        if depth == 0:
+            return min(max(horizon, lower), upper)
+        if lower >= beta or lower == upper:
+            return lower
+        if upper <= alpha:
+            return upper
+
+        if self.deadline != None and time.process_time() > self.deadline:
+            raise SearchTimeout()
+
+        alpha, beta = max(alpha, lower), min(beta, upper)
+        alpha_original, beta_original = alpha, beta
+
+        # Every reply at the last ply is a leaf, so ordering them would cost as much as searching them
+        tetrominos: list[Tetromino] = self.__ordered_moves(t_board, player) if depth > 1 else t_board.playable_tetrominos(player)
+
+        best_outcome: int = LOSS
+        for tetromino in tetrominos:
+            undo: PlacementUndo = t_board.apply(tetromino, player)
+            outcome: int = -self.__negamax(t_board, player.opponent, -beta, -alpha, depth - 1, -horizon)
+            t_board.undo(undo)
+
+            best_outcome = max(best_outcome, outcome)
+            alpha = max(alpha, outcome)
+            if alpha >= beta:
+                break
+
+        # Counting the horizon as a loss can only underestimate the outcome, and counting it as a win overestimate it, so only
+        # results which are not themselves bounds from the other side are proven
+        if horizon == LOSS and best_outcome > alpha_original:
+            lower = max(lower, best_outcome)
+        elif horizon == WIN and best_outcome < beta_original:
+            upper = min(upper, best_outcome)
+
+        if len(self.cache) >= MAX_CACHE_ENTRIES:
+            self.cache.clear()
+        self.cache[key] = (lower, upper)
+
+        return best_outcome
+
+    def __ordered_moves(self, t_board: TBoard, player: PlayerColor) -> list[Tetromino]:
+        """
+        Playable tetrominos of the player, ordered by the number of replies they leave the opponent. A move leaving no replies
+        wins the game outright, unless it is the last turn, so it is returned on its own.
+        """
+        reply_counts: list[tuple[int, Tetromino]] = []
+
+        for placement_id in sorted(t_board.player_playable_tetrominos[player]):
+            tetromino: Tetromino = Tetromino.from_placement(placement_id)
+            undo: PlacementUndo = t_board.apply(tetromino, player)
+            num_replies: int = t_board.num_playable_tetrorminos(player.opponent)
+            max_turn_reached: bool = t_board.max_turn_reached()
+            t_board.undo(undo)
+
+            if not num_replies and not max_turn_reached:
+                return [tetromino]
+            reply_counts.append((num_replies, tetromino))
+
+        reply_counts.sort(key=lambda reply_count: reply_count[0])
+        return [tetromino for _, tetromino in reply_counts]
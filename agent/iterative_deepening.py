@@ -0,0 +1,125 @@
+import math
+import time
+from typing import Callable
+from referee.game.constants import MAX_TURNS
+from referee.game.player import PlayerColor
+from .t_board import TBoard
+from .tetromino import Tetromino
+from .best_next_move import best_next_move, principal_variation
+from .search_context import SearchContext, SearchTimeout, SearchAlgorithm
+
+# Per turn budget when the referee imposes no time limit
+UNLIMITED_TURN_TIME: float = 1.0
+# Fraction of the remaining time which may be spent, leaving a margin for updates and timer overheads
+TIME_SAFETY_FACTOR: float = 0.9
+# An iteration is not started unless the remaining budget allows for it taking this many times as long as the last one
+MIN_ITERATION_GROWTH: float = 2.0
+MAX_SEARCH_DEPTH: int = 32
+# Half-width of the window around the previous iteration's utility which principal variation search first searches the root with
+ASPIRATION_WINDOW: float = 8
+
+def turn_time_budget(time_remaining: float | None, turn_count: int) -> float:
+    """
+    Splits the remaining time evenly over the moves the agent would have left if the game ran until MAX_TURNS. Time not used
+    by a turn carries over to the budgets of later turns.
+    """
+    if time_remaining == None:
+        return UNLIMITED_TURN_TIME
+
+    moves_left: int = max(math.ceil((MAX_TURNS - turn_count) / 2), 1)
+    return max(time_remaining * TIME_SAFETY_FACTOR, 0) / moves_left
+
+def aspiration_search(t_board: TBoard, player: PlayerColor, context: SearchContext, depth: int, expected_utility: float) -> tuple[float, Tetromino | None]:
+    """
+    Searches the root with a narrow window around the expected utility, widening the side of the window the result fell
+    outside of until the utility is known exactly.
+    """
+    alpha, beta = float('-inf'), float('inf')
+    if not math.isinf(expected_utility):
+        alpha, beta = expected_utility - ASPIRATION_WINDOW, expected_utility + ASPIRATION_WINDOW
+
+    while True:
+        utility, move = best_next_move(t_board, player, player, alpha, beta, depth, context)
+
+        if utility <= alpha and not math.isinf(alpha):
+            alpha = float('-inf')
+        elif utility >= beta and not math.isinf(beta):
+            beta = float('inf')
+        else:
+            return utility, move
+
+        if context.stats != None:
+            context.stats.re_searches += 1
+
+def iterative_deepening(
+    t_board: TBoard,
+    player: PlayerColor,
+    context: SearchContext,
+    time_budget: float,
+    *,
+    start_depth: int = 1,
+    max_depth: int = MAX_SEARCH_DEPTH,
+    on_iteration: Callable[[int, float, Tetromino], None] | None = None,
+) -> tuple[float, Tetromino, int]:
+    """
+    Searches the position to increasing depths until the time budget runs out, returning the utility and move found by the
+    deepest completed iteration, along with that depth. Each iteration searches the previous iteration's best move first, as
+    it is stored in the context's transposition table. A start depth above 1 skips the shallow iterations, for when the
+    transposition table already holds the position's subtree from an earlier search. The depth, utility and move of each
+    completed iteration are passed to on_iteration, if given.
+    """
+    start_time: float = time.process_time()
+    context.deadline = start_time + time_budget
+    # A search abandoned at its deadline leaves the ply and null move state where it stopped
+    context.ply = 0
+    context.null_move_searching = False
+    context.extension_plies = 0
+    if context.move_history != None:
+        context.move_history.new_search()
+
+    # The search is abandoned part-way through when the deadline passes, so it is done on a copy of the board
+    search_board: TBoard = t_board.copy()
+    if context.territory_evaluation:
+        # Tracked from the root, so every board in the search has its regions split incrementally from its parent's
+        search_board.find_regions()
+
+    best_utility: float = 0
+    best_move: Tetromino | None = None
+    completed_depth: int = 0
+
+    depth_limit: int = min(max_depth, MAX_TURNS - t_board.turn_count)
+    start_depth = max(min(start_depth, depth_limit), 1)
+
+    for depth in range(start_depth, depth_limit + 1):
+        iteration_start_time: float = time.process_time()
+
+        try:
+            if context.algorithm == SearchAlgorithm.PRINCIPAL_VARIATION and completed_depth > 0:
+                utility, move = aspiration_search(search_board, player, context, depth, best_utility)
+            else:
+                utility, move = best_next_move(search_board, player, player, float('-inf'), float('inf'), depth, context)
+        except SearchTimeout:
+            break
+
+        if move == None:
+            break
+        best_utility, best_move, completed_depth = utility, move, depth
+        if on_iteration != None:
+            on_iteration(depth, utility, move)
+
+        if math.isinf(best_utility):
+            # The game's outcome is decided within the horizon, so deeper searches cannot change it
+            break
+
+        now: float = time.process_time()
+        if context.deadline - now < (now - iteration_start_time) * MIN_ITERATION_GROWTH:
+            break
+
+    context.deadline = None
+
+    if best_move == None:
+        # Not even the first iteration finished in time, so fall back on the best move of an earlier search, if one is stored
+        stored_variation: list[Tetromino] = principal_variation(t_board, player, context, start_depth)
+        best_move = stored_variation[0] if stored_variation else t_board.playable_tetrominos(player, sort=True)[0]
+
+    return best_utility, best_move, completed_depth
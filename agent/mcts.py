@@ -0,0 +1,143 @@
+import math
+import random
+import time
+from referee.game.player import PlayerColor
+from .t_board import TBoard, PlacementUndo
+from .tetromino import Tetromino
+from .zobrist import PLAYER_TO_MOVE_KEYS
+
+# Weight of the exploration term of UCT, relative to a child's mean result in [0, 1]
+EXPLORATION_WEIGHT: float = math.sqrt(2)
+# Rollouts stop after this many plies, scoring the position by the sign of its heuristic utility instead
+ROLLOUT_DEPTH: int = 8
+# Results of a single playout, from the perspective of the player who moved into a node
+WIN_RESULT: float = 1
+DRAW_RESULT: float = 0.5
+LOSS_RESULT: float = 0
+
+class MCTSNode:
+    """
+    Node of the Monte Carlo search tree, reached by the player placing the tetromino. Results are totalled from that
+    player's perspective. Children are expanded one at a time, in order of static desirability.
+    """
+    def __init__(self, tetromino: Tetromino | None, player: PlayerColor, parent: 'MCTSNode | None'):
+        self.tetromino: Tetromino | None = tetromino
+        self.player: PlayerColor = player
+        self.parent: MCTSNode | None = parent
+        self.children: list[MCTSNode] = []
+        # None until the node is first expanded, as generating moves for nodes which are never expanded is wasted
+        self.untried_tetrominos: list[Tetromino] | None = None
+        self.visits: int = 0
+        self.total_result: float = 0
+
+    def uct_child(self) -> 'MCTSNode':
+        log_visits: float = math.log(self.visits)
+        return max(self.children, key=lambda child: child.total_result / child.visits + EXPLORATION_WEIGHT * math.sqrt(log_visits / child.visits))
+
+    def most_visited_child(self) -> 'MCTSNode':
+        return max(self.children, key=lambda child: child.visits)
+
+class MonteCarloTreeSearch:
+    """
+    Anytime UCT search, which samples playouts until its time budget runs out. Playouts are played on the bitboard through
+    apply and undo, choosing uniformly from the maintained playable placements. The tree is kept between turns, re-rooted
+    onto each move as it is played, so the samples below the moves actually played are reused.
+    """
+    def __init__(self, seed: int = 30024):
+        self.root: MCTSNode | None = None
+        # Key of the position the root represents, which is checked before reusing the tree
+        self.root_key: int | None = None
+        self.rng: random.Random = random.Random(seed)
+        self.playouts: int = 0
+
+    def advance(self, tetromino: Tetromino) -> None:
+        """
+        Re-roots the tree onto the child reached by the tetromino, discarding the rest of the tree.
+        """
+        if self.root == None:
+            return
+
+        self.root = next((child for child in self.root.children if child.tetromino == tetromino), None)
+        if self.root != None:
+            self.root.parent = None
+        self.root_key = None
+
+    def search(self, t_board: TBoard, player: PlayerColor, time_budget: float) -> Tetromino:
+        """
+        Samples playouts from the position until the time budget runs out, returning the most visited move. The board is
+        searched in place, and is left unchanged on return.
+        """
+        deadline: float = time.process_time() + time_budget
+        key: int = t_board.zobrist_hash ^ PLAYER_TO_MOVE_KEYS[player]
+
+        if self.root == None or self.root.player != player.opponent or (self.root_key != None and self.root_key != key):
+            self.root = MCTSNode(None, player.opponent, None)
+        self.root_key = key
+
+        while True:
+            self.__playout(t_board, player)
+            self.playouts += 1
+            if self.root.children and time.process_time() > deadline:
+                break
+
+        return self.root.most_visited_child().tetromino
+
+    def __playout(self, t_board: TBoard, player: PlayerColor) -> None:
+        node: MCTSNode = self.root
+        undos: list[PlacementUndo] = []
+
+        # Selection, down through fully expanded nodes
+        while node.untried_tetrominos != None and not node.untried_tetrominos and node.children:
+            node = node.uct_child()
+            undos.append(t_board.apply(node.tetromino, node.player))
+            player = player.opponent
+
+        # Expansion, of a single child
+        if not self.__game_over(t_board, player):
+            if node.untried_tetrominos == None:
+                # Popped from the end, so the most desirable move is tried first
+                node.untried_tetrominos = t_board.playable_tetrominos(player, sort=True, remove_equivalent=True)[::-1]
+
+            child: MCTSNode = MCTSNode(node.untried_tetrominos.pop(), player, node)
+            node.children.append(child)
+            node = child
+            undos.append(t_board.apply(node.tetromino, node.player))
+            player = player.opponent
+
+        result: float = self.__rollout(t_board, player)
+
+        # Backpropagation, where the result is from the perspective of the player to move at the end of the rollout
+        while node != None:
+            node.visits += 1
+            node.total_result += result if node.player == player else 1 - result
+            node = node.parent
+
+        for undo in reversed(undos):
+            t_board.undo(undo)
+
+    def __rollout(self, t_board: TBoard, player: PlayerColor) -> float:
+        """
+        Plays random moves from the position, returning the result for the player to move at the end of the rollout, which is
+        the given player.
+        """
+        undos: list[PlacementUndo] = []
+        rollout_player: PlayerColor = player
+
+        for _ in range(ROLLOUT_DEPTH):
+            if self.__game_over(t_board, rollout_player):
+                break
+
+            placement_id: int = self.rng.choice(tuple(t_board.player_playable_tetrominos[rollout_player]))
+            undos.append(t_board.apply(Tetromino.from_placement(placement_id), rollout_player))
+            rollout_player = rollout_player.opponent
+
+        # Rollouts of an odd length end with the opponent to move, so the score is taken for the original player throughout
+        score: float = t_board.player_score(player)
+
+        for undo in reversed(undos):
+            t_board.undo(undo)
+
+        return WIN_RESULT if score > 0 else LOSS_RESULT if score < 0 else DRAW_RESULT
+
+    def __game_over(self, t_board: TBoard, player: PlayerColor) -> bool:
+        return t_board.max_turn_reached() or not t_board.player_playable_tetrominos[player]
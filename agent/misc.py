@@ -22,5 +22,10 @@ def all_board_coords() -> list[Coord]:
 
     return coords
 
-def coord_adjacents(coord: Coord) -> list[Coord]:
-    return [coord.up(), coord.down(), coord.right(), coord.left()]
\ No newline at end of file
+def coord_adjacents(coord: Coord) -> tuple[Coord, ...]:
+    return COORD_ADJACENTS[coord]
+
+# Orthogonal neighbours of every coordinate on the board, wrapping around the edges
+COORD_ADJACENTS: dict[Coord, tuple[Coord, ...]] = {
+    coord: (coord.up(), coord.down(), coord.right(), coord.left()) for coord in all_board_coords()
+}
\ No newline at end of file
@@ -0,0 +1,55 @@
+from typing import Callable
+from .placements import NUM_PLACEMENTS
+from .tetromino import Tetromino
+
+NUM_KILLERS: int = 2
+# Killer moves are ordered before any other move but the transposition table's best move
+KILLER_BONUS: float = 1000
+# Weight of the history score, which is normalised to [0, 1], relative to the static desirability of a move
+HISTORY_WEIGHT: float = 4
+
+class MoveHistory:
+    """
+    Move ordering learned from the moves which caused cutoffs: killer moves for each ply, and a history table keyed by
+    placement id whose scores are added to each move's static desirability.
+    """
+    def __init__(self):
+        self.history: list[int] = [0] * NUM_PLACEMENTS
+        self.max_history: int = 0
+        self.killers: list[list[int]] = []
+
+    def new_search(self) -> None:
+        """
+        Ages the history table and forgets the killer moves, as positions have moved on since the last search.
+        """
+        self.history = [score >> 1 for score in self.history]
+        self.max_history >>= 1
+        self.killers = []
+
+    def record_cutoff(self, tetromino: Tetromino, ply: int, depth: int) -> None:
+        placement_id: int = tetromino.placement_id
+
+        self.history[placement_id] += depth * depth
+        self.max_history = max(self.max_history, self.history[placement_id])
+
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        ply_killers: list[int] = self.killers[ply]
+        if placement_id in ply_killers:
+            ply_killers.remove(placement_id)
+        ply_killers.insert(0, placement_id)
+        del ply_killers[NUM_KILLERS:]
+
+    def ordering_bonus(self, ply: int) -> Callable[[Tetromino], float]:
+        ply_killers: list[int] = self.killers[ply] if ply < len(self.killers) else []
+        history: list[int] = self.history
+        history_scale: float = HISTORY_WEIGHT / (self.max_history + 1)
+
+        def bonus(tetromino: Tetromino) -> float:
+            placement_id: int = tetromino.placement_id
+            if placement_id in ply_killers:
+                return KILLER_BONUS - ply_killers.index(placement_id)
+
+            return history[placement_id] * history_scale
+
+        return bonus
@@ -0,0 +1,140 @@
+import atexit
+import math
+import multiprocessing
+import sys
+import time
+from multiprocessing.pool import Pool
+from referee.game.player import PlayerColor
+from .t_board import TBoard
+from .tetromino import Tetromino
+from .transposition_table import SharedTranspositionTable
+from .search_context import SearchContext, SearchAlgorithm
+from .move_history import MoveHistory
+from .iterative_deepening import iterative_deepening
+
+# (depth, utility, best placement id) of each iteration a worker completed
+WorkerIterations = list[tuple[int, float, int]]
+
+# Search state of a worker process, kept across turns like the agent's own
+_worker_context: SearchContext | None = None
+
+def _init_worker(table_name: str, table_size_bits: int, algorithm: SearchAlgorithm, late_move_reductions: bool, null_move_pruning: bool) -> None:
+    global _worker_context
+    _worker_context = SearchContext(
+        SharedTranspositionTable(table_size_bits, table_name),
+        move_history=MoveHistory(),
+        algorithm=algorithm,
+        late_move_reductions=late_move_reductions,
+        null_move_pruning=null_move_pruning,
+    )
+
+def _search_root_share(
+    player_boards: dict[PlayerColor, int],
+    turn_count: int,
+    player: PlayerColor,
+    placement_ids: list[int],
+    time_budget: float,
+) -> tuple[WorkerIterations, float]:
+    """
+    Searches the position, restricted to the given root moves, returning the result of each completed iteration along with
+    the process time the worker used.
+    """
+    start_time: float = time.process_time()
+    iterations: WorkerIterations = []
+
+    _worker_context.root_placement_ids = set(placement_ids)
+    iterative_deepening(
+        TBoard(player_boards, turn_count),
+        player,
+        _worker_context,
+        time_budget,
+        on_iteration=lambda depth, utility, tetromino: iterations.append((depth, utility, tetromino.placement_id)),
+    )
+    _worker_context.root_placement_ids = None
+
+    return iterations, time.process_time() - start_time
+
+class ParallelRootSearch:
+    """
+    Pool of worker processes searching shares of the root moves in parallel, each with an iterative deepening search, through
+    a transposition table in shared memory. The pool and the table are created once and kept for the whole game.
+
+    The referee's CountdownTimer measures time.process_time() of the agent's own process, which does not include the CPU time
+    of its child processes, but the rules limit the CPU time the agent uses in total. The turn budget is therefore split
+    evenly between the workers, so the search uses about as much CPU time as a single search given the same budget, and the
+    CPU time the workers actually used is kept in worker_time for the agent to charge against its own remaining time. With
+    a core free for each worker, the search takes about 1/N of the budget in wall time. The benchmark's parallel subcommand
+    measures both.
+    """
+    def __init__(
+        self,
+        num_workers: int,
+        *,
+        algorithm: SearchAlgorithm = SearchAlgorithm.MINIMAX,
+        late_move_reductions: bool = False,
+        null_move_pruning: bool = False,
+        table_size_bits: int = 18,
+    ):
+        self.num_workers: int = num_workers
+        self.transposition_table: SharedTranspositionTable = SharedTranspositionTable(table_size_bits)
+
+        # Started processes close their stdin, which the referee replaces with an object that cannot be closed
+        stdin = sys.stdin
+        sys.stdin = None
+        try:
+            self.pool: Pool | None = multiprocessing.Pool(
+                num_workers,
+                initializer=_init_worker,
+                initargs=(self.transposition_table.name, table_size_bits, algorithm, late_move_reductions, null_move_pruning),
+            )
+        finally:
+            sys.stdin = stdin
+        # Process time the workers used on the last search, which the referee's timer does not see
+        self.worker_time: float = 0
+        atexit.register(self.close)
+
+    def search(self, t_board: TBoard, player: PlayerColor, time_budget: float) -> tuple[float, Tetromino, int]:
+        """
+        Searches the position for up to the time budget, which is shared between the workers, returning the utility, move and
+        depth of the result, as iterative_deepening does.
+        """
+        root_tetrominos: list[Tetromino] = t_board.playable_tetrominos(player, sort=True)
+        # Dealt out in turn, so that every worker has a share of the most promising moves
+        shares: list[list[int]] = [[tetromino.placement_id for tetromino in root_tetrominos[i::self.num_workers]] for i in range(self.num_workers)]
+        shares = [share for share in shares if share]
+
+        worker_results: list[tuple[WorkerIterations, float]] = self.pool.starmap(
+            _search_root_share,
+            [(t_board.player_boards, t_board.turn_count, player, share, time_budget / len(shares)) for share in shares],
+        )
+        self.worker_time = sum(worker_time for _, worker_time in worker_results)
+
+        return self.__reduce([iterations for iterations, _ in worker_results], root_tetrominos)
+
+    def __reduce(self, worker_iterations: list[WorkerIterations], root_tetrominos: list[Tetromino]) -> tuple[float, Tetromino, int]:
+        """
+        Combines the workers' results at the deepest depth every worker completed, where a worker which stopped on a decided
+        utility counts as having completed every depth. The best utility wins, with ties broken by the move ordering, so the
+        result does not depend on the order the workers finished in.
+        """
+        depth: float = min(
+            math.inf if iterations and math.isinf(iterations[-1][1]) else iterations[-1][0] if iterations else 0
+            for iterations in worker_iterations
+        )
+        if depth == 0:
+            # Some worker did not finish even its first iteration
+            return 0, root_tetrominos[0], 0
+
+        move_order: dict[int, int] = {tetromino.placement_id: i for i, tetromino in enumerate(root_tetrominos)}
+        results: list[tuple[int, float, int]] = [
+            [iteration for iteration in iterations if iteration[0] <= depth][-1] for iterations in worker_iterations
+        ]
+        _, best_utility, best_placement_id = max(results, key=lambda result: (result[1], -move_order[result[2]]))
+
+        return best_utility, Tetromino.from_placement(best_placement_id), max(result[0] for result in results)
+
+    def close(self) -> None:
+        if self.pool != None:
+            self.pool.terminate()
+            self.transposition_table.close()
+            self.pool = None
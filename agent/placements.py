@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from referee.game.coord import Coord
+from referee.game.pieces import _TEMPLATES
+from .bitboard import NUM_CELLS, adjacent_mask, coords_mask, index_coord, mask_indices
+
+@dataclass(frozen=True, slots=True)
+class Placement:
+    """
+    A tetromino template translated to a specific anchor cell on the board. A placement's id is anchor_index * NUM_TEMPLATES +
+    template_index, so ids follow row-major anchor order and are stable across runs.
+    """
+    id: int
+    coords: tuple[Coord, Coord, Coord, Coord]
+    mask: int
+    adj_mask: int
+    rows: tuple[int, ...]
+    cols: tuple[int, ...]
+
+NUM_TEMPLATES: int = len(_TEMPLATES)
+NUM_PLACEMENTS: int = NUM_CELLS * NUM_TEMPLATES
+
+def _create_placement(placement_id: int) -> Placement:
+    anchor: Coord = index_coord(placement_id // NUM_TEMPLATES)
+    template = list(_TEMPLATES.values())[placement_id % NUM_TEMPLATES]
+    coords: tuple[Coord, ...] = tuple(anchor + offset for offset in template)
+    mask: int = coords_mask(coords)
+
+    return Placement(
+        placement_id,
+        coords,
+        mask,
+        adjacent_mask(mask) & ~mask,
+        tuple(sorted({coord.r for coord in coords})),
+        tuple(sorted({coord.c for coord in coords})),
+    )
+
+PLACEMENTS: list[Placement] = [_create_placement(placement_id) for placement_id in range(NUM_PLACEMENTS)]
+PLACEMENT_IDS: dict[int, int] = {placement.mask: placement.id for placement in PLACEMENTS}
+
+def placements_at(anchor_index: int) -> range:
+    return range(anchor_index * NUM_TEMPLATES, (anchor_index + 1) * NUM_TEMPLATES)
+
+def placement_id_from_mask(mask: int) -> int:
+    if mask not in PLACEMENT_IDS:
+        raise Exception("Coordinates do not form a tetromino")
+
+    return PLACEMENT_IDS[mask]
+
+def _cell_placements(adjacent: bool) -> list[tuple[int, ...]]:
+    cell_placements: list[list[int]] = [[] for _ in range(NUM_CELLS)]
+    for placement in PLACEMENTS:
+        for cell_index in mask_indices(placement.adj_mask if adjacent else placement.mask):
+            cell_placements[cell_index].append(placement.id)
+
+    return [tuple(placement_ids) for placement_ids in cell_placements]
+
+# Reverse indices from each cell to the placements which cover it, and to the placements which it neighbours
+CELL_PLACEMENTS: list[tuple[int, ...]] = _cell_placements(adjacent=False)
+CELL_ADJ_PLACEMENTS: list[tuple[int, ...]] = _cell_placements(adjacent=True)
+# Bitsets over placement ids of the placements covering each cell, so the placements covering any set of cells are found by
+# ORing them
+CELL_PLACEMENT_SETS: list[int] = [sum(1 << placement_id for placement_id in placement_ids) for placement_ids in CELL_PLACEMENTS]
+
+def placement_set_ids(placement_set: int) -> list[int]:
+    """
+    Placement ids in a bitset over placement ids, found a byte at a time as the sets are usually sparse.
+    """
+    placement_ids: list[int] = []
+    for byte_index, byte in enumerate(placement_set.to_bytes((NUM_PLACEMENTS + 7) // 8, 'little')):
+        while byte:
+            low_bit: int = byte & -byte
+            placement_ids.append(byte_index * 8 + low_bit.bit_length() - 1)
+            byte ^= low_bit
+
+    return placement_ids
+
+def cells_placement_set(mask: int) -> int:
+    placement_set: int = 0
+    for cell_index in mask_indices(mask):
+        placement_set |= CELL_PLACEMENT_SETS[cell_index]
+
+    return placement_set
+
+# Bitsets over placement ids of every placement, and of the placements overlapping each placement
+ALL_PLACEMENTS_SET: int = (1 << NUM_PLACEMENTS) - 1
+PLACEMENT_OVERLAP_SETS: list[int] = [cells_placement_set(placement.mask) for placement in PLACEMENTS]
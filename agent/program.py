@@ -1,10 +1,40 @@
 # COMP30024 Artificial Intelligence, Semester 1 2024
 # Project Part B: Game Playing Agent
 
+import os
+import time
+from enum import Enum
 from referee.game import PlayerColor, Action, PlaceAction, Coord
 from .t_board import TBoard
 from .tetromino import Tetromino
-from .best_next_move import best_next_move
+from .transposition_table import TranspositionTable
+from .search_context import SearchContext
+from .iterative_deepening import iterative_deepening, turn_time_budget
+from .best_next_move import principal_variation
+from .search_stats import SearchStats, write_stats_line
+from .move_history import MoveHistory
+from .endgame import EndgameSolver, ENDGAME_MOBILITY_THRESHOLD, LOSS
+from .mcts import MonteCarloTreeSearch
+from .parallel_search import ParallelRootSearch
+
+# Fraction of the turn's time budget the endgame solver may use before falling back on the heuristic search
+ENDGAME_TIME_FRACTION: float = 0.5
+
+# Setting this to a file path, or to "-" for stderr, writes one JSON line of search stats per action
+SEARCH_STATS_ENV_VAR: str = "AGENT_SEARCH_STATS"
+# Setting this to the name of a SearchEngine selects it, for when the agent is created by the referee
+SEARCH_ENGINE_ENV_VAR: str = "AGENT_SEARCH_ENGINE"
+# Setting this to a number above 1 searches the root in parallel across that many worker processes, up to the number of cores
+SEARCH_WORKERS_ENV_VAR: str = "AGENT_SEARCH_WORKERS"
+
+class SearchEngine(Enum):
+    ALPHA_BETA = 1
+    MONTE_CARLO = 2
+
+# Names the search stats give the turns not searched by a SearchEngine itself
+OPENING_ENGINE: str = "OPENING"
+ENDGAME_ENGINE: str = "ENDGAME"
+PARALLEL_ENGINE: str = "PARALLEL_ALPHA_BETA"
 
 class Agent:
     """
@@ -13,12 +43,46 @@ class Agent:
     """
     #start with empty board class from previous project
 
-    def __init__(self, color: PlayerColor, **referee: dict):
+    def __init__(
+        self,
+        color: PlayerColor,
+        *,
+        search_engine: SearchEngine | None = None,
+        num_search_workers: int | None = None,
+        search_stats_path: str | None = None,
+        **referee: dict,
+    ):
         """
         This constructor method runs when the referee instantiates the agent.
         Any setup and/or precomputation should be done here.
         """
         self.t_board: TBoard = TBoard()
+        self.search_engine: SearchEngine = search_engine if search_engine != None else SearchEngine[os.environ.get(SEARCH_ENGINE_ENV_VAR, SearchEngine.ALPHA_BETA.name)]
+        # The tree is kept for the whole game, re-rooted onto each move played
+        self.monte_carlo_tree_search: MonteCarloTreeSearch | None = MonteCarloTreeSearch() if self.search_engine == SearchEngine.MONTE_CARLO else None
+        self.search_stats_path: str | None = search_stats_path if search_stats_path != None else os.environ.get(SEARCH_STATS_ENV_VAR)
+        # The transposition table is kept for the whole game, as its entries are keyed by position and remain valid across turns
+        self.search_context: SearchContext = SearchContext(
+            TranspositionTable(),
+            stats=SearchStats() if self.search_stats_path else None,
+            move_history=MoveHistory(),
+            late_move_reductions=True,
+            null_move_pruning=True,
+        )
+        num_search_workers = num_search_workers if num_search_workers != None else int(os.environ.get(SEARCH_WORKERS_ENV_VAR, 1))
+        # Workers beyond the number of cores only share them, so they would search no deeper
+        num_search_workers = min(num_search_workers, os.cpu_count() or 1)
+        self.parallel_search: ParallelRootSearch | None = None
+        if num_search_workers > 1 and self.search_engine == SearchEngine.ALPHA_BETA:
+            self.parallel_search = ParallelRootSearch(num_search_workers, late_move_reductions=True, null_move_pruning=True)
+        # CPU time the parallel search's workers used, which the referee's timer does not see but the time limit still covers
+        self.worker_time_used: float = 0
+        # Its cache of solved positions is kept for the whole game, so an unfinished solve still speeds up later ones
+        self.endgame_solver: EndgameSolver = EndgameSolver()
+        # Moves expected to follow our last action, and the depth they were searched to
+        self.principal_variation: list[Tetromino] = []
+        self.principal_variation_depth: int = 0
+        self.warm_start_depth: int = 1
 
         self._color = color
         match color:
@@ -33,18 +97,65 @@ class Agent:
         This method is called by the referee each time it is the agent's turn
         to take an action. It must always return an action object. 
         """
+        stats: SearchStats | None = self.search_context.stats
+        if stats != None:
+            stats.reset()
+            start_time, start_wall_time = time.process_time(), time.perf_counter()
+
+        tetromino, engine = self.__select_move(referee)
 
+        if stats != None:
+            worker_time: float | None = self.parallel_search.worker_time if engine == PARALLEL_ENGINE else None
+            search_time, wall_time = time.process_time() - start_time, time.perf_counter() - start_wall_time
+            write_stats_line(stats.to_json(self.t_board.turn_count, self._color.name, engine, search_time, wall_time, worker_time), self.search_stats_path)
+
+        return tetromino.create_action()
+
+    def __select_move(self, referee: dict) -> tuple[Tetromino, str]:
+        """
+        Chooses the move to play, returning it along with the name of the engine which chose it, for the search stats.
+        """
         if self.t_board.turn_count <= 1:
-            return self.t_board.any_playable_tetromino().create_action()
+            return self.t_board.any_playable_tetromino(), OPENING_ENGINE
 
-        alpha, beta = float('-inf'), float('inf')
-        time_remaining: float = referee['time_remaining']
+        time_remaining: float | None = referee['time_remaining']
+        if time_remaining != None:
+            time_remaining -= self.worker_time_used
         space_remaining: float = referee['space_remaining']
-        
-        minimax_depth = self.t_board.minimax_depth(time_remaining, self._color, max_depth=6, normal_depth=4, min_depth=2)
 
-        _, tetromino = best_next_move(self.t_board, self._color, self._color, alpha, beta, minimax_depth)
-        return tetromino.create_action()
+        time_budget: float = turn_time_budget(time_remaining, self.t_board.turn_count)
+
+        mobility: int = self.t_board.num_playable_tetrorminos(self._color) + self.t_board.num_playable_tetrorminos(self._color.opponent)
+        if mobility <= ENDGAME_MOBILITY_THRESHOLD:
+            solve_start_time: float = time.process_time()
+            solution: tuple[int, Tetromino] | None = self.endgame_solver.solve(self.t_board, self._color, time_budget * ENDGAME_TIME_FRACTION)
+
+            # A lost position is left to the heuristic search, which picks the move most likely to trouble the opponent
+            if solution != None and solution[0] != LOSS:
+                self.principal_variation, self.principal_variation_depth = [], 0
+                return solution[1], ENDGAME_ENGINE
+            time_budget -= time.process_time() - solve_start_time
+
+        if self.monte_carlo_tree_search != None:
+            return self.monte_carlo_tree_search.search(self.t_board, self._color, time_budget), SearchEngine.MONTE_CARLO.name
+        if self.parallel_search != None:
+            # The shared table holds no entry for the root, as each worker only searched part of it
+            self.principal_variation, self.principal_variation_depth = [], 0
+            _, tetromino, depth = self.parallel_search.search(self.t_board, self._color, time_budget)
+            self.worker_time_used += self.parallel_search.worker_time
+            self.__record_depth(depth)
+            return tetromino, PARALLEL_ENGINE
+
+        _, tetromino, depth = iterative_deepening(self.t_board, self._color, self.search_context, time_budget, start_depth=self.warm_start_depth)
+        self.__record_depth(depth)
+
+        self.principal_variation = principal_variation(self.t_board, self._color, self.search_context, depth)
+        self.principal_variation_depth = depth
+        return tetromino, SearchEngine.ALPHA_BETA.name
+
+    def __record_depth(self, depth: int) -> None:
+        if self.search_context.stats != None:
+            self.search_context.stats.depth_completed = depth
 
     def update(self, color: PlayerColor, action: Action, **referee: dict):
         """
@@ -52,7 +163,16 @@ class Agent:
         turn. You should use it to update the agent's internal game state. 
         """
 
-        self.t_board.place_tetromino_in_place(Tetromino.tetromino_from_action(action), color)
+        tetromino: Tetromino = Tetromino.tetromino_from_action(action)
+        self.t_board.place_tetromino_in_place(tetromino, color)
+        if self.monte_carlo_tree_search != None:
+            self.monte_carlo_tree_search.advance(tetromino)
+
+        if color != self._color:
+            # If the opponent played the predicted reply, the transposition table already holds the subtree below it, two
+            # plies shallower than our last search
+            predicted_reply: bool = len(self.principal_variation) >= 2 and self.principal_variation[1] == tetromino
+            self.warm_start_depth = max(self.principal_variation_depth - 2, 1) if predicted_reply else 1
         
         # There is only one action type, PlaceAction
         place_action: PlaceAction = action
@@ -0,0 +1,75 @@
+import time
+from enum import Enum
+from .transposition_table import TranspositionTable, SharedTranspositionTable
+from .search_stats import SearchStats
+from .move_history import MoveHistory
+
+class SearchTimeout(Exception):
+    """
+    Raised from within the search once the deadline of its SearchContext has passed.
+    """
+
+class SearchAlgorithm(Enum):
+    MINIMAX = 1
+    PRINCIPAL_VARIATION = 2
+
+class SearchContext:
+    """
+    State shared by every node of a search, which persists across the iterations of an iterative deepening search. The
+    deadline is in process time, as that is what the referee's timer measures.
+    """
+    def __init__(
+        self,
+        transposition_table: TranspositionTable | SharedTranspositionTable | None = None,
+        deadline: float | None = None,
+        stats: SearchStats | None = None,
+        move_history: MoveHistory | None = None,
+        algorithm: SearchAlgorithm = SearchAlgorithm.MINIMAX,
+        remove_similar: bool = False,
+        late_move_reductions: bool = False,
+        null_move_pruning: bool = False,
+        batch_evaluation: bool = True,
+        territory_evaluation: bool = False,
+        threat_extensions: bool = False,
+        quiescence: bool = False,
+    ):
+        # Holds values from the main player's perspective, with every node keyed by its canonical form
+        self.transposition_table: TranspositionTable | SharedTranspositionTable | None = transposition_table
+        self.deadline: float | None = deadline
+        self.stats: SearchStats | None = stats
+        # Killer moves and history scores blended into the move ordering, updated on every cutoff
+        self.move_history: MoveHistory | None = move_history
+        # Principal variation search probes every move after the first with a null window, and only searches it with the full
+        # window if it may improve on the best
+        self.algorithm: SearchAlgorithm = algorithm
+        # Opts into the lossy pruning of moves whose static desirability equals the previous move's, trading soundness for speed
+        self.remove_similar: bool = remove_similar
+        # Opt into searching moves late in the ordering to a reduced depth, and into probing whether the position holds even if
+        # the player to move passes, each verified by a full depth search before they are trusted. Neither is used in the turn
+        # limit mode
+        self.late_move_reductions: bool = late_move_reductions
+        self.null_move_pruning: bool = null_move_pruning
+        # Allows nodes one ply from the horizon to score all their children at once, rather than searching them one at a time,
+        # when NumPy is available
+        self.batch_evaluation: bool = batch_evaluation
+        # Opts into adding the difference in placements each player alone can reach to the utility of leaves, which nodes
+        # one ply from the horizon cannot score in a batch
+        self.territory_evaluation: bool = territory_evaluation
+        # Opts into searching a ply deeper after moves leaving the opponent few replies, a bounded number of times per line,
+        # which nodes one ply from the horizon cannot do in a batch
+        self.threat_extensions: bool = threat_extensions
+        # Opts into playing out the line clears available at leaves before scoring them, which nodes one ply from the horizon
+        # cannot do in a batch
+        self.quiescence: bool = quiescence
+        # Distance of the node being searched from the root
+        self.ply: int = 0
+        # Set while searching below a null move, as passing twice in a row proves nothing
+        self.null_move_searching: bool = False
+        # Plies of threat extensions along the line being searched
+        self.extension_plies: int = 0
+        # Restricts the root to these moves, when a parallel search shares them out between its workers
+        self.root_placement_ids: set[int] | None = None
+
+    def check_deadline(self) -> None:
+        if self.deadline != None and time.process_time() > self.deadline:
+            raise SearchTimeout()
@@ -0,0 +1,69 @@
+import json
+import sys
+
+# Stats are written to stderr when this is given as their path, as stdout is reserved for the referee
+STDERR_PATH: str = "-"
+
+class SearchStats:
+    """
+    Counters collected by the search over a single action, for tuning. Times are in seconds.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.nodes: int = 0
+        self.interior_nodes: int = 0
+        self.cutoffs: int = 0
+        self.first_move_cutoffs: int = 0
+        self.re_searches: int = 0
+        self.reduced_searches: int = 0
+        self.null_move_cutoffs: int = 0
+        self.immediate_wins: int = 0
+        self.threat_extensions: int = 0
+        self.quiescence_nodes: int = 0
+        self.tt_probes: int = 0
+        self.tt_hits: int = 0
+        self.tt_stores: int = 0
+        self.depth_completed: int = 0
+        self.move_generation_time: float = 0
+        self.ordering_time: float = 0
+        self.evaluation_time: float = 0
+
+    def record_cutoff(self, move_index: int) -> None:
+        self.cutoffs += 1
+        self.first_move_cutoffs += move_index == 0
+
+    def to_json(self, turn_count: int, player: str, engine: str, search_time: float, wall_time: float, worker_time: float | None = None) -> str:
+        return json.dumps({
+            "turn": turn_count,
+            "player": player,
+            "engine": engine,
+            "depth": self.depth_completed,
+            "time": round(search_time, 4),
+            "wall_time": round(wall_time, 4),
+            "worker_time": round(worker_time, 4) if worker_time != None else None,
+            "nodes": self.nodes,
+            "nodes_per_second": round(self.nodes / search_time) if search_time > 0 else None,
+            "cutoff_rate": round(self.cutoffs / self.interior_nodes, 4) if self.interior_nodes else None,
+            "first_move_cutoff_ratio": round(self.first_move_cutoffs / self.cutoffs, 4) if self.cutoffs else None,
+            "re_searches": self.re_searches,
+            "reduced_searches": self.reduced_searches,
+            "null_move_cutoffs": self.null_move_cutoffs,
+            "immediate_wins": self.immediate_wins,
+            "threat_extensions": self.threat_extensions,
+            "quiescence_nodes": self.quiescence_nodes,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_stores": self.tt_stores,
+            "move_generation_time": round(self.move_generation_time, 4),
+            "ordering_time": round(self.ordering_time, 4),
+            "evaluation_time": round(self.evaluation_time, 4),
+        })
+
+def write_stats_line(line: str, path: str) -> None:
+    if path == STDERR_PATH:
+        print(line, file=sys.stderr)
+    else:
+        with open(path, "a") as stats_file:
+            stats_file.write(line + "\n")
@@ -0,0 +1,121 @@
+from referee.game.constants import BOARD_N
+from referee.game.player import PlayerColor
+from .bitboard import NUM_CELLS, FULL_MASK, COL_MASKS
+from .placements import PLACEMENTS, PLACEMENT_IDS
+from .zobrist import TURN_KEYS, PLAYER_TO_MOVE_KEYS, mask_hash
+
+# The board wraps around, and the set of tetromino templates is closed under transposition, so any position is strategically
+# identical to its cyclic row/col translations and their transposes. A symmetry is (transpose, row shift, col shift),
+# transposing first and then translating.
+Symmetry = tuple[bool, int, int]
+
+IDENTITY: Symmetry = (False, 0, 0)
+SYMMETRIES: list[Symmetry] = [(transpose, row_shift, col_shift) for transpose in (False, True) for row_shift in range(BOARD_N) for col_shift in range(BOARD_N)]
+
+_ROW_BITS: int = (1 << BOARD_N) - 1
+
+# Cells at or right of each col, and left of each col
+_COLS_FROM_MASKS: list[int] = [sum(COL_MASKS[col_] for col_ in range(col, BOARD_N)) for col in range(BOARD_N)]
+_COLS_BEFORE_MASKS: list[int] = [sum(COL_MASKS[col_] for col_ in range(col)) for col in range(BOARD_N)]
+
+def _transposed_row(row: int, row_bits: int) -> int:
+    return sum(1 << (col * BOARD_N + row) for col in range(BOARD_N) if row_bits >> col & 1)
+
+_TRANSPOSED_ROWS: list[list[int]] = [[_transposed_row(row, row_bits) for row_bits in range(1 << BOARD_N)] for row in range(BOARD_N)]
+
+def transpose_mask(mask: int) -> int:
+    transposed: int = 0
+    for row in range(BOARD_N):
+        transposed |= _TRANSPOSED_ROWS[row][(mask >> (row * BOARD_N)) & _ROW_BITS]
+
+    return transposed
+
+def shift_rows(mask: int, row_shift: int) -> int:
+    shift: int = row_shift * BOARD_N
+    return ((mask << shift) | (mask >> (NUM_CELLS - shift))) & FULL_MASK
+
+def shift_cols(mask: int, col_shift: int) -> int:
+    return ((mask << col_shift) & _COLS_FROM_MASKS[col_shift]) | ((mask >> (BOARD_N - col_shift)) & _COLS_BEFORE_MASKS[col_shift])
+
+def transform_mask(mask: int, symmetry: Symmetry) -> int:
+    transpose, row_shift, col_shift = symmetry
+    if transpose:
+        mask = transpose_mask(mask)
+
+    return shift_rows(shift_cols(mask, col_shift), row_shift)
+
+def inverse_symmetry(symmetry: Symmetry) -> Symmetry:
+    transpose, row_shift, col_shift = symmetry
+    if transpose:
+        return (True, -col_shift % BOARD_N, -row_shift % BOARD_N)
+
+    return (False, -row_shift % BOARD_N, -col_shift % BOARD_N)
+
+def transform_placement(placement_id: int, symmetry: Symmetry) -> int:
+    if symmetry == IDENTITY:
+        return placement_id
+
+    return PLACEMENT_IDS[transform_mask(PLACEMENTS[placement_id].mask, symmetry)]
+
+def canonical_form(player_boards: dict[PlayerColor, int]) -> tuple[tuple[int, int], Symmetry, list[Symmetry]]:
+    """
+    Finds the lexicographically smallest (red, blue) boards over every symmetry of the position. Returns the canonical boards,
+    a symmetry mapping the position onto them, and every symmetry mapping the position onto itself.
+    """
+    red_board: int = player_boards[PlayerColor.RED]
+    blue_board: int = player_boards[PlayerColor.BLUE]
+
+    canonical_boards: tuple[int, int] = (red_board, blue_board)
+    canonical_symmetry: Symmetry = IDENTITY
+    position_symmetries: list[Symmetry] = []
+
+    for transpose in (False, True):
+        red_transposed: int = transpose_mask(red_board) if transpose else red_board
+        blue_transposed: int = transpose_mask(blue_board) if transpose else blue_board
+
+        for col_shift in range(BOARD_N):
+            red_shifted: int = shift_cols(red_transposed, col_shift)
+            blue_shifted: int = shift_cols(blue_transposed, col_shift)
+
+            for row_shift in range(BOARD_N):
+                boards: tuple[int, int] = (shift_rows(red_shifted, row_shift), shift_rows(blue_shifted, row_shift))
+
+                if boards < canonical_boards:
+                    canonical_boards, canonical_symmetry = boards, (transpose, row_shift, col_shift)
+                if boards[0] == red_board and boards[1] == blue_board:
+                    position_symmetries.append((transpose, row_shift, col_shift))
+
+    return canonical_boards, canonical_symmetry, position_symmetries
+
+def canonical_position_key(player_boards: dict[PlayerColor, int], turn_count: int, player: PlayerColor) -> tuple[int, Symmetry, list[Symmetry]]:
+    """
+    Transposition table key shared by every position symmetric to this one, along with the results of canonical_form. The
+    key is the Zobrist hash of the canonical boards, so it equals the position's own Zobrist key when it is canonical.
+    """
+    (canonical_red_board, canonical_blue_board), canonical_symmetry, position_symmetries = canonical_form(player_boards)
+    key: int = (
+        mask_hash(canonical_red_board, PlayerColor.RED) ^ mask_hash(canonical_blue_board, PlayerColor.BLUE)
+        ^ TURN_KEYS[turn_count] ^ PLAYER_TO_MOVE_KEYS[player]
+    )
+
+    return key, canonical_symmetry, position_symmetries
+
+def remove_symmetric_placements(placement_ids: list[int], position_symmetries: list[Symmetry]) -> list[int]:
+    """
+    Keeps only the first of each group of placements which are mapped onto one another by a symmetry of the position, as
+    they lead to equivalent positions.
+    """
+    if len(position_symmetries) <= 1:
+        return placement_ids
+
+    seen: set[int] = set()
+    unique_placement_ids: list[int] = []
+
+    for placement_id in placement_ids:
+        if placement_id in seen:
+            continue
+
+        unique_placement_ids.append(placement_id)
+        seen.update(transform_placement(placement_id, symmetry) for symmetry in position_symmetries)
+
+    return unique_placement_ids
@@ -1,85 +1,299 @@
+from dataclasses import dataclass
+from typing import Callable, Collection
 from referee.game.coord import Coord
 from referee.game.player import PlayerColor
 from referee.game.constants import BOARD_N, MAX_TURNS
 from .tetromino import Tetromino
-from .t_board_counter import TBoardCounter
-from .misc import row_coords, col_coords, all_board_coords, coord_adjacents
-from .move_ordering import calculate_move_desirability, DesirabilityMetric
-import numpy as np
-from typing import Callable
+from .move_ordering import calculate_move_desirability, calculate_move_desirabilities, DesirabilityMetric
+from .bitboard import adjacent_mask, completed_lines, lines_mask, mask_coords, mask_indices, FULL_MASK, LINE_MASKS
+from .placements import Placement, PLACEMENTS, CELL_PLACEMENTS, CELL_PLACEMENT_SETS, ALL_PLACEMENTS_SET, PLACEMENT_OVERLAP_SETS, cells_placement_set, placement_set_ids
+from .zobrist import PLACEMENT_KEYS, TURN_KEYS, mask_hash, position_hash
+from .territory import split_regions, territory_score
+
+# Within this many turns of MAX_TURNS, positions are scored by token balance, which decides the game at the turn limit,
+# instead of by mobility
+TURN_LIMIT_MODE_TURNS: int = 10
+
+@dataclass(frozen=True, slots=True)
+class PlacementUndo:
+    """
+    Record of the changes made by TBoard.apply, allowing TBoard.undo to restore the board to its state before the placement.
+    Changes are stored per side, for the player who placed and their opponent, so no containers are built for them.
+    """
+    placement_id: int
+    player: PlayerColor
+    zobrist_hash: int
+    player_removed_tokens: int
+    opponent_removed_tokens: int
+    player_added_playable: Collection[int]
+    player_removed_playable: Collection[int]
+    opponent_added_playable: Collection[int]
+    opponent_removed_playable: Collection[int]
+    player_frontier: int
+    opponent_frontier: int
+    empty_regions: list[int] | None
 
 class TBoard:
+    """
+    Game state of a Tetress board, where each player's tokens are stored as a bitmask of the cells they occupy.
+    """
+    # When set, every incremental update of the playable tetrominos is cross-checked against a full rescan of the board
+    DEBUG_PLAYABLE_TETROMINOS: bool = False
+
     def __init__(
         self,
-        board: dict[Coord, PlayerColor] = {},
+        player_boards: dict[PlayerColor, int] | None = None,
         turn_count: int = 0,
-        player_num_tokens: dict[PlayerColor, int] = {PlayerColor.RED: 0, PlayerColor.BLUE: 0},
-        player_playable_tetrominos: dict[PlayerColor, set[Tetromino]] = {PlayerColor.RED: set(), PlayerColor.BLUE: set()},
-        t_board_counter: TBoardCounter = TBoardCounter(),
+        player_playable_tetrominos: dict[PlayerColor, set[int]] | None = None,
+        zobrist_hash: int | None = None,
+        player_frontiers: dict[PlayerColor, int] | None = None,
+        empty_regions: list[int] | None = None,
     ):
-        self.board: dict[Coord, PlayerColor] = board
+        self.player_boards: dict[PlayerColor, int] = player_boards if player_boards != None else {PlayerColor.RED: 0, PlayerColor.BLUE: 0}
         self.turn_count: int = turn_count
-        self.player_num_tokens = player_num_tokens
-        self.player_playable_tetrominos: dict[PlayerColor, set[Tetromino]] = player_playable_tetrominos
-        self.t_board_counter: TBoardCounter = t_board_counter 
+        # Empty cells orthogonally adjacent to each player's tokens, which every playable tetromino of the player covers
+        self.player_frontiers: dict[PlayerColor, int] = player_frontiers if player_frontiers != None else self.__find_frontiers()
+        # Playable tetrominos are stored as their placement ids
+        self.player_playable_tetrominos: dict[PlayerColor, set[int]] = player_playable_tetrominos if player_playable_tetrominos != None else self.__find_playable_tetrominos()
+        # Maintained incrementally by apply and undo
+        self.zobrist_hash: int = zobrist_hash if zobrist_hash != None else position_hash(self.player_boards, self.turn_count)
+        # Connected regions of empty cells, which are only tracked once find_regions is first called, as most boards never
+        # need them. apply then keeps them up to date by splitting just the region a placement lands in.
+        self.empty_regions: list[int] | None = empty_regions
+
+    @property
+    def occupied(self) -> int:
+        return self.player_boards[PlayerColor.RED] | self.player_boards[PlayerColor.BLUE]
+
+    @property
+    def player_num_tokens(self) -> dict[PlayerColor, int]:
+        return {player: player_board.bit_count() for player, player_board in self.player_boards.items()}
+
+    @property
+    def board(self) -> dict[Coord, PlayerColor]:
+        return {coord: player for player, player_board in self.player_boards.items() for coord in mask_coords(player_board)}
 
     def any_playable_tetromino(self) -> Tetromino:
-        for row in range(BOARD_N):
-            for col in range(BOARD_N):
-                curr_coord: Coord = Coord(row, col)
-                if curr_coord not in self.board:
-                    for tetromino in Tetromino.all_tetrominos_at(curr_coord):
-                        if self.__tetromino_fits(tetromino):
-                            return tetromino
-                        
+        occupied: int = self.occupied
+        for placement in PLACEMENTS:
+            if not occupied & placement.mask:
+                return Tetromino.from_placement(placement.id)
+
     def num_playable_tetrorminos(self, player: PlayerColor) -> int:
         return len(self.player_playable_tetrominos[player])
 
-    def playable_tetrominos(self, player: PlayerColor, *, sort: bool = False, remove_similar: bool = False) -> list[Tetromino]:
+    def playable_tetrominos(
+        self,
+        player: PlayerColor,
+        *,
+        sort: bool = False,
+        remove_similar: bool = False,
+        remove_equivalent: bool = False,
+        ordering_bonus: Callable[[Tetromino], float] | None = None,
+    ) -> list[Tetromino]:
+        """
+        Playable tetrominos of the player, optionally sorted from most to least desirable. Moves are compared by their static
+        desirability, plus the ordering bonus if one is given. Static desirability is the resulting token balance in the turn
+        limit mode, and the number of cells a move opens up otherwise. remove_equivalent soundly drops moves leading to the same
+        position as an earlier move, while remove_similar is lossy, dropping moves whose static desirability equals the
+        previous move's even though they lead to different positions.
+        """
         if sort:
-            find_desirability = lambda tetro: (tetro, self.tetromino_desirability(tetro, player, DesirabilityMetric.NUM_NOT_OWN_ADJ_COORDS))
+            desirability_metric: DesirabilityMetric = DesirabilityMetric.TOKEN_BALANCE if self.turn_limit_mode() else DesirabilityMetric.NUM_NOT_OWN_ADJ_COORDS
             key = lambda elem: elem[1]
 
-            sorted_tetrominos: list[tuple[Tetromino, float]] = sorted(list(map(find_desirability, self.player_playable_tetrominos[player])), reverse=True, key=key)
+            # Ties are broken by placement id rather than set iteration order, so that searches are reproducible
+            placement_ids: list[int] = sorted(self.player_playable_tetrominos[player])
+            desirabilities: list[float] = self.tetromino_desirabilities(placement_ids, player, desirability_metric)
+            sorted_tetrominos: list[tuple[Tetromino, float]] = sorted(zip(map(Tetromino.from_placement, placement_ids), desirabilities), reverse=True, key=key)
 
             if remove_similar:
                 sorted_tetrominos = [sorted_tetrominos[i] for i in range(len(sorted_tetrominos)) if i == 0 or sorted_tetrominos[i][1] != sorted_tetrominos[i-1][1]]
 
-            return [tetromino for tetromino, _ in sorted_tetrominos]
+            if ordering_bonus != None:
+                sorted_tetrominos.sort(reverse=True, key=lambda elem: elem[1] + ordering_bonus(elem[0]))
+
+            tetrominos: list[Tetromino] = [tetromino for tetromino, _ in sorted_tetrominos]
         else:
-            return list(self.player_playable_tetrominos[player])
+            tetrominos = list(map(Tetromino.from_placement, self.player_playable_tetrominos[player]))
+
+        return self.__remove_equivalent_tetrominos(tetrominos, player) if remove_equivalent else tetrominos
+
+    def blocking_tetrominos(self, player: PlayerColor) -> list[Tetromino]:
+        """
+        Playable tetrominos of the player after which the opponent has no playable tetromino, in placement id order. Without
+        line clears, a placement only takes from the opponent the placements overlapping it, so the moves overlapping all of
+        the opponent's are found by intersecting their overlap sets, which usually empties within a few placements. Moves
+        which clear lines are instead checked against the opponent's frontier on the cleared board.
+        """
+        candidates: int = ALL_PLACEMENTS_SET
+        for placement_id in self.player_playable_tetrominos[player.opponent]:
+            candidates &= PLACEMENT_OVERLAP_SETS[placement_id]
+            if not candidates:
+                break
+
+        clearing: int = self.__clearing_placements()
+        if not candidates and not clearing:
+            return []
+
+        blocking_ids: list[int] = []
+        for placement_id in sorted(self.player_playable_tetrominos[player]):
+            if clearing >> placement_id & 1:
+                if self.__clear_blocks_opponent(placement_id, player):
+                    blocking_ids.append(placement_id)
+            elif candidates >> placement_id & 1:
+                blocking_ids.append(placement_id)
+
+        return list(map(Tetromino.from_placement, blocking_ids))
+
+    def clearing_tetrominos(self, player: PlayerColor) -> list[Tetromino]:
+        """
+        Playable tetrominos of the player which complete a line, in placement id order.
+        """
+        clearing: int = self.__clearing_placements()
+        if not clearing:
+            return []
+
+        return [Tetromino.from_placement(placement_id) for placement_id in sorted(self.player_playable_tetrominos[player]) if clearing >> placement_id & 1]
+
+    def line_counts(self) -> list[int]:
+        """
+        Number of tokens in each line, in the order of LINE_MASKS.
+        """
+        occupied: int = self.occupied
+        return [(occupied & line_mask).bit_count() for line_mask in LINE_MASKS]
+
+    def placement_hash(self, tetromino: Tetromino, player: PlayerColor) -> int:
+        """
+        Zobrist hash of the tokens on the board after the player places the tetromino, leaving the board unchanged.
+        """
+        placement_hash: int = self.zobrist_hash ^ PLACEMENT_KEYS[player][tetromino.placement_id]
+
+        placement: Placement = PLACEMENTS[tetromino.placement_id]
+        removed_rows, removed_cols = completed_lines(self.occupied | tetromino.mask, placement.rows, placement.cols)
+        if removed_rows or removed_cols:
+            removed_mask: int = lines_mask(removed_rows, removed_cols)
+            player_boards: dict[PlayerColor, int] = self.player_boards.copy()
+            player_boards[player] |= tetromino.mask
+            for player_color, player_board in player_boards.items():
+                placement_hash ^= mask_hash(player_board & removed_mask, player_color)
+
+        return placement_hash
     
+    def find_regions(self) -> list[int]:
+        if self.empty_regions == None:
+            self.empty_regions = split_regions(FULL_MASK & ~self.occupied)
+
+        return self.empty_regions
+
+    def territory_score(self, player: PlayerColor) -> int:
+        """
+        Difference in placements within the regions only the player can reach and those only the opponent can reach.
+        """
+        return territory_score(self.find_regions(), self.player_frontiers, player)
+
     def max_turn_reached(self) -> bool:
         return self.turn_count == MAX_TURNS
 
+    def turn_limit_mode(self) -> bool:
+        return self.turn_count >= MAX_TURNS - TURN_LIMIT_MODE_TURNS
+
     def player_score(self, player: PlayerColor) -> float:
+        """
+        Utility of the position for the player. Games decided by the turn limit or by a player running out of moves are won
+        or lost outright. Otherwise the position is scored by the difference in playable tetrominos, or by the difference in
+        tokens once the turn limit is close enough to decide the game.
+        """
         if self.max_turn_reached():
-            player_tokens: int = self.player_num_tokens[player]
-            opponent_tokens: int = self.player_num_tokens[player.opponent]
+            player_tokens: int = self.player_boards[player].bit_count()
+            opponent_tokens: int = self.player_boards[player.opponent].bit_count()
             return float('inf') if player_tokens > opponent_tokens else float('-inf') if player_tokens < opponent_tokens else 0
         elif not self.player_playable_tetrominos[player] or not self.player_playable_tetrominos[player.opponent]:
             return float('-inf') if not self.player_playable_tetrominos[player] else float('inf')
+        elif self.turn_limit_mode():
+            return self.player_boards[player].bit_count() - self.player_boards[player.opponent].bit_count()
 
         return len(self.player_playable_tetrominos[player]) - len(self.player_playable_tetrominos[player.opponent])
     
     def copy(self) -> 'TBoard':
-        return TBoard(self.board.copy(), self.turn_count, self.player_num_tokens.copy(), self.player_playable_tetrominos.copy(), self.t_board_counter.copy())
+        return TBoard(self.player_boards.copy(), self.turn_count, {player: playable.copy() for player, playable in self.player_playable_tetrominos.items()}, self.zobrist_hash, self.player_frontiers.copy(), self.empty_regions)
     
     def place_tetromino_in_place(self, tetromino: Tetromino, player: PlayerColor) -> None:
-        for token in tetromino.tokens:
-            if token in self.board:
-                raise Exception("Placing token in occupied coordinate")
-            
-            self.board[token] = player
+        self.apply(tetromino, player)
 
+    def apply(self, tetromino: Tetromino, player: PlayerColor) -> PlacementUndo:
+        """
+        Places the tetromino in place, returning a record which can be passed to undo to reverse the placement.
+        """
+        if self.occupied & tetromino.mask:
+            raise Exception("Placing token in occupied coordinate")
+
+        opponent: PlayerColor = player.opponent
+        zobrist_hash: int = self.zobrist_hash
+        player_frontier, opponent_frontier = self.player_frontiers[player], self.player_frontiers[opponent]
+        empty_regions: list[int] | None = self.empty_regions
+        self.player_boards[player] |= tetromino.mask
+        self.zobrist_hash ^= PLACEMENT_KEYS[player][tetromino.placement_id] ^ TURN_KEYS[self.turn_count] ^ TURN_KEYS[self.turn_count + 1]
         self.turn_count += 1
-        self.player_num_tokens[player] += 4 
 
-        removed_rows, removed_cols = self.t_board_counter.place_tetromino(tetromino)
-        self.__remove_rows(removed_rows)
-        self.__remove_cols(removed_cols)
+        placement: Placement = PLACEMENTS[tetromino.placement_id]
+        removed_rows, removed_cols = completed_lines(self.occupied, placement.rows, placement.cols)
+        if removed_rows or removed_cols:
+            player_removed_tokens, opponent_removed_tokens = self.__remove_lines(removed_rows, removed_cols, player)
+            # Clearing lines frees cells next to any remaining token, so the frontiers are found again from the boards
+            self.__update_frontiers()
+            playable_tetrominos: dict[PlayerColor, set[int]] = self.__find_playable_tetrominos()
+            player_added, player_removed = self.__update_playable_tetrominos(player, playable_tetrominos[player])
+            opponent_added, opponent_removed = self.__update_playable_tetrominos(opponent, playable_tetrominos[opponent])
+            if empty_regions != None:
+                self.empty_regions = split_regions(FULL_MASK & ~self.occupied)
+        else:
+            player_removed_tokens, opponent_removed_tokens = 0, 0
+            player_added, player_removed, opponent_removed = self.__update_placed_playable_tetrominos(tetromino.mask, player)
+            opponent_added = ()
+            if empty_regions != None:
+                self.empty_regions = self.__split_placed_region(empty_regions, tetromino.mask)
+
+        if TBoard.DEBUG_PLAYABLE_TETROMINOS and (
+            self.player_playable_tetrominos != self.__find_playable_tetrominos()
+            or self.player_frontiers != self.__find_frontiers()
+            or self.empty_regions != None and sorted(self.empty_regions) != sorted(split_regions(FULL_MASK & ~self.occupied))
+        ):
+            raise Exception("Incremental playable tetrominos, frontiers or regions differ from a full rescan")
+
+        return PlacementUndo(
+            tetromino.placement_id,
+            player,
+            zobrist_hash,
+            player_removed_tokens,
+            opponent_removed_tokens,
+            player_added,
+            player_removed,
+            opponent_added,
+            opponent_removed,
+            player_frontier,
+            opponent_frontier,
+            empty_regions,
+        )
 
-        self.__update_playable_tetrominos()
+    def undo(self, undo: PlacementUndo) -> None:
+        """
+        Reverses the placement recorded by undo, which must be the most recent placement applied to this board.
+        """
+        player, opponent = undo.player, undo.player.opponent
+        player_playable, opponent_playable = self.player_playable_tetrominos[player], self.player_playable_tetrominos[opponent]
+        player_playable.difference_update(undo.player_added_playable)
+        player_playable.update(undo.player_removed_playable)
+        opponent_playable.difference_update(undo.opponent_added_playable)
+        opponent_playable.update(undo.opponent_removed_playable)
+
+        self.player_boards[player] = (self.player_boards[player] | undo.player_removed_tokens) & ~PLACEMENTS[undo.placement_id].mask
+        self.player_boards[opponent] |= undo.opponent_removed_tokens
+        self.turn_count -= 1
+        self.zobrist_hash = undo.zobrist_hash
+        self.player_frontiers[player] = undo.player_frontier
+        self.player_frontiers[opponent] = undo.opponent_frontier
+        self.empty_regions = undo.empty_regions
 
     def place_tetromino(self, tetromino: Tetromino, player: PlayerColor) -> 'TBoard':
         t_board_copy: 'TBoard' = self.copy()
@@ -88,81 +302,162 @@ class TBoard:
         return t_board_copy
     
     def tetromino_desirability(self, tetromino: Tetromino, player: PlayerColor, desirability_metric: DesirabilityMetric) -> float:
-        return calculate_move_desirability(self.board, tetromino, player, desirability_metric)
-
-    def minimax_depth(self, time_remaining: float | None, player: PlayerColor, *, max_depth: int, normal_depth: int, min_depth: int) -> int:
-        num_playable_moves: int = self.num_playable_tetrorminos(player)
-
-        if time_remaining == None:
-            if (num_playable_moves < 10):
-                return max_depth
-            elif (num_playable_moves > 45):
-                return min_depth
-            else:       
-                return normal_depth
-        elif (time_remaining > 75):
-            if (num_playable_moves < 15):
-                return max_depth
-            elif (num_playable_moves > 65):
-                return min_depth
-            else:       
-                return normal_depth
-        elif (time_remaining < 10):
-            return min_depth
-        else:
-            if (num_playable_moves < 10):
-                return max_depth
-            elif (num_playable_moves > 40):
-                return min_depth
-            else:       
-                return normal_depth
- 
-    def __update_playable_tetrominos(self) -> None:
-        self.player_playable_tetrominos = self.__find_playable_tetrominos()
-
-    def __find_playable_tetrominos(self) -> dict[PlayerColor, set[Tetromino]]:
-        red_tetrominos: set[Tetromino] = set()
-        blue_tetrominos: set[Tetromino] = set()
-
-        for coord in all_board_coords():
-            if coord not in self.board:
-                for tetromino in [tetromino_ for tetromino_ in Tetromino.all_tetrominos_at(coord) if self.__tetromino_fits(tetromino_)]:
-                    if tetromino not in red_tetrominos and self.__can_place_tetromino(tetromino, PlayerColor.RED):
-                        red_tetrominos.add(tetromino)
-                    if tetromino not in blue_tetrominos and self.__can_place_tetromino(tetromino, PlayerColor.BLUE):
-                        blue_tetrominos.add(tetromino)
-
-        return {PlayerColor.RED: red_tetrominos, PlayerColor.BLUE: blue_tetrominos}
-    
-    def __tetromino_fits(self, tetromino: Tetromino) -> bool:
-        return all(token not in self.board for token in tetromino.tokens)
-    
-    def __can_place_tetromino(self, tetromino: Tetromino, player: PlayerColor) -> bool:
-        return self.__tetromino_fits(tetromino) and any(self.__has_adj_token(coord, player) for coord in tetromino.tokens)
-    
-    def __has_adj_token(self, coord: Coord, player: PlayerColor) -> bool:
-        return any(self.board[adj_coord] == player for adj_coord in coord_adjacents(coord) if adj_coord in self.board)
+        return calculate_move_desirability(self.player_boards, tetromino, player, desirability_metric)
+
+    def tetromino_desirabilities(self, placement_ids: list[int], player: PlayerColor, desirability_metric: DesirabilityMetric) -> list[float]:
+        return calculate_move_desirabilities(self.player_boards, self.player_frontiers, placement_ids, player, desirability_metric)
+
+    def __near_complete_mask(self) -> int:
+        """
+        Lines missing at most four tokens, which are the only lines a single placement can complete.
+        """
+        near_complete_mask: int = 0
+        for line_mask, line_count in zip(LINE_MASKS, self.line_counts()):
+            if line_count >= BOARD_N - 4:
+                near_complete_mask |= line_mask
+
+        return near_complete_mask
+
+    def __clearing_placements(self) -> int:
+        """
+        Bitset over placement ids of the placements which would complete a line, which must cover every empty cell of it, so
+        they are found directly from the lines missing at most four tokens.
+        """
+        occupied: int = self.occupied
+        clearing: int = 0
+        for line_mask, line_count in zip(LINE_MASKS, self.line_counts()):
+            if BOARD_N - 4 <= line_count < BOARD_N:
+                completing: int = ALL_PLACEMENTS_SET
+                for cell_index in mask_indices(line_mask & ~occupied):
+                    completing &= CELL_PLACEMENT_SETS[cell_index]
+                clearing |= completing
+
+        return clearing
+
+    def __clear_blocks_opponent(self, placement_id: int, player: PlayerColor) -> bool:
+        """
+        Whether the placement, which clears lines, leaves the opponent no playable tetromino on the cleared board.
+        """
+        placement: Placement = PLACEMENTS[placement_id]
+        placement_mask: int = placement.mask
+        removed_mask: int = lines_mask(*completed_lines(self.occupied | placement.mask, placement.rows, placement.cols))
+        opponent_board: int = self.player_boards[player.opponent] & ~removed_mask
+
+        # Any of the opponent's placements which the move neither covers nor cuts off from the opponent's tokens survives it
+        for opponent_placement_id in self.player_playable_tetrominos[player.opponent]:
+            opponent_placement: Placement = PLACEMENTS[opponent_placement_id]
+            if not opponent_placement.mask & placement_mask and opponent_placement.adj_mask & opponent_board:
+                return False
+
+        occupied: int = (self.occupied | placement_mask) & ~removed_mask
+        opponent_frontier: int = adjacent_mask(opponent_board) & FULL_MASK & ~occupied
+
+        return not cells_placement_set(opponent_frontier) & ~cells_placement_set(occupied)
+
+    def __remove_equivalent_tetrominos(self, tetrominos: list[Tetromino], player: PlayerColor) -> list[Tetromino]:
+        """
+        Distinct placements can only lead to the same position when line clears remove every token which differs between
+        them, so only placements touching a line which they could complete are compared, by their resulting hashes.
+        """
+        near_complete_mask: int = self.__near_complete_mask()
+        if not near_complete_mask:
+            return tetrominos
+
+        unique_tetrominos: list[Tetromino] = []
+        seen_hashes: set[int] = set()
+        for tetromino in tetrominos:
+            if tetromino.mask & near_complete_mask:
+                placement_hash: int = self.placement_hash(tetromino, player)
+                if placement_hash in seen_hashes:
+                    continue
+                seen_hashes.add(placement_hash)
+
+            unique_tetrominos.append(tetromino)
+
+        return unique_tetrominos
+
+    def __update_placed_playable_tetrominos(self, placed_mask: int, player: PlayerColor) -> tuple[list[int], set[int], set[int]]:
+        """
+        Updates the frontiers and playable tetrominos after a placement which cleared no lines, returning the tetrominos the
+        player gained and those the player and their opponent lost. Only tetrominos covering a placed token become
+        unplayable, and only tetrominos covering a cell newly on the player's frontier can become playable.
+        """
+        occupied: int = self.occupied
+        opponent: PlayerColor = player.opponent
+
+        frontier: int = self.player_frontiers[player]
+        new_frontier: int = (frontier | adjacent_mask(placed_mask)) & ~occupied
+        self.player_frontiers[player] = new_frontier
+        self.player_frontiers[opponent] &= ~placed_mask
+
+        covering_placements: set[int] = set()
+        for cell_index in mask_indices(placed_mask):
+            covering_placements.update(CELL_PLACEMENTS[cell_index])
+
+        player_tetrominos: set[int] = self.player_playable_tetrominos[player]
+        opponent_tetrominos: set[int] = self.player_playable_tetrominos[opponent]
+        player_removed: set[int] = player_tetrominos & covering_placements
+        opponent_removed: set[int] = opponent_tetrominos & covering_placements
+        player_tetrominos -= player_removed
+        opponent_tetrominos -= opponent_removed
+
+        added: list[int] = []
+        for cell_index in mask_indices(new_frontier & ~frontier):
+            for placement_id in CELL_PLACEMENTS[cell_index]:
+                if placement_id not in player_tetrominos and not occupied & PLACEMENTS[placement_id].mask:
+                    player_tetrominos.add(placement_id)
+                    added.append(placement_id)
+
+        return added, player_removed, opponent_removed
+
+    def __update_playable_tetrominos(self, player: PlayerColor, playable_tetrominos: set[int]) -> tuple[set[int], set[int]]:
+        """
+        Replaces the player's playable tetrominos with those regenerated after line clears, returning those added and removed.
+        """
+        playable: set[int] = self.player_playable_tetrominos[player]
+        added: set[int] = playable_tetrominos - playable
+        removed: set[int] = playable - playable_tetrominos
+        playable -= removed
+        playable |= added
+
+        return added, removed
+
+    @staticmethod
+    def __split_placed_region(empty_regions: list[int], placed_mask: int) -> list[int]:
+        """
+        Regions after a placement which cleared no lines, where only the region the tetromino was placed in can change.
+        """
+        placed_region: int = next(region for region in empty_regions if region & placed_mask)
+        return [region for region in empty_regions if region != placed_region] + split_regions(placed_region & ~placed_mask)
+
+    def __update_frontiers(self) -> None:
+        for player, frontier in self.__find_frontiers().items():
+            self.player_frontiers[player] = frontier
+
+    def __find_frontiers(self) -> dict[PlayerColor, int]:
+        occupied: int = self.occupied
+        return {player: adjacent_mask(player_board) & ~occupied for player, player_board in self.player_boards.items()}
+
+    def __find_playable_tetrominos(self) -> dict[PlayerColor, set[int]]:
+        """
+        Playable tetrominos of both players, generated only from the placements covering a cell on each player's frontier.
+        """
+        occupied_placements: int = cells_placement_set(self.occupied)
+        return {player: set(placement_set_ids(cells_placement_set(frontier) & ~occupied_placements)) for player, frontier in self.player_frontiers.items()}
     
-    def __remove_rows(self, rows: list[int]) -> None:
-        for row_index in rows:
-            for coord in row_coords(row_index):
-                if coord in self.board:
-                    self.player_num_tokens[self.board[coord]] -= 1
-                    del self.board[coord]
-
-    def __remove_cols(self, cols: list[int]) -> None:
-        for col_index in cols:
-            for coord in col_coords(col_index):
-                if coord in self.board:
-                    self.player_num_tokens[self.board[coord]] -= 1
-                    del self.board[coord]
+    def __remove_lines(self, rows: list[int], cols: list[int], player: PlayerColor) -> tuple[int, int]:
+        """
+        Removes the tokens in the lines, returning those removed from the player and from their opponent.
+        """
+        removed_mask: int = lines_mask(rows, cols)
+        player_removed_tokens: int = self.player_boards[player] & removed_mask
+        opponent_removed_tokens: int = self.player_boards[player.opponent] & removed_mask
+        self.player_boards[player] &= ~removed_mask
+        self.player_boards[player.opponent] &= ~removed_mask
+        self.zobrist_hash ^= mask_hash(player_removed_tokens, player) ^ mask_hash(opponent_removed_tokens, player.opponent)
+
+        return player_removed_tokens, opponent_removed_tokens
                 
     @staticmethod
     def create_board_id(t_board: 'TBoard') -> int:
-        compute_board_position = lambda row, col: row * BOARD_N + col
-        board_positions: np.ndarray = np.zeros(BOARD_N * BOARD_N)
-
-        for coord, player in t_board.board.items():
-            board_positions[compute_board_position(coord.r, coord.c)] = 2 if player == PlayerColor.RED else 1
-
-        return hash(tuple(board_positions))
\ No newline at end of file
+        return t_board.zobrist_hash
@@ -0,0 +1,57 @@
+from functools import lru_cache
+from referee.game.player import PlayerColor
+from .bitboard import adjacent_mask
+from .placements import cells_placement_set
+
+# Regions with fewer cells than a tetromino can never be played in
+MIN_REGION_CELLS: int = 4
+
+def split_regions(empty: int) -> list[int]:
+    """
+    Splits the empty cells into connected regions, wrapping around the board edges, by flood filling from the lowest empty
+    cell not yet in a region.
+    """
+    regions: list[int] = []
+    while empty:
+        region: int = empty & -empty
+        while True:
+            grown: int = (region | adjacent_mask(region)) & empty
+            if grown == region:
+                break
+            region = grown
+
+        regions.append(region)
+        empty &= ~region
+
+    return regions
+
+@lru_cache(maxsize=1 << 16)
+def region_placements(region: int) -> int:
+    """
+    Number of placements lying entirely within the region. A placement covering a cell of the region and a cell outside it
+    must also cover a cell bordering the region, as its cells are connected.
+    """
+    if region.bit_count() < MIN_REGION_CELLS:
+        return 0
+
+    border: int = adjacent_mask(region) & ~region
+    return (cells_placement_set(region) & ~cells_placement_set(border)).bit_count()
+
+def territory_score(regions: list[int], player_frontiers: dict[PlayerColor, int], player: PlayerColor) -> int:
+    """
+    Difference between the placements in regions only the player can reach and those in regions only the opponent can
+    reach. A player reaches a region when it is on their frontier, and nothing but a line clear can let the other player
+    into it, so these placements stay available to the player however the rest of the game goes. Regions too small for any
+    tetromino count for neither player.
+    """
+    player_frontier, opponent_frontier = player_frontiers[player], player_frontiers[player.opponent]
+
+    score: int = 0
+    for region in regions:
+        if region & player_frontier:
+            if not region & opponent_frontier:
+                score += region_placements(region)
+        elif region & opponent_frontier:
+            score -= region_placements(region)
+
+    return score
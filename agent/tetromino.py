@@ -1,44 +1,51 @@
-from referee.game.pieces import _TEMPLATES
 from referee.game.coord import Coord
 from referee.game.actions import Action
-from .misc import coord_adjacents
+from .bitboard import coords_mask, coord_index, mask_coords
+from .placements import PLACEMENTS, placements_at, placement_id_from_mask
 
 class Tetromino:
     """
-    Class that represents a tetromino in the game, comprising four tokens, each defined using an instance of Coord. 
+    Class that represents a tetromino in the game, comprising four tokens, each defined using an instance of Coord. One
+    instance is shared by every use of each placement, through from_placement, so its derived data is computed only once.
     """
+    __slots__ = ("tokens", "mask", "placement_id", "adj_coords")
+
     def __init__(self, c1: Coord, c2: Coord, c3: Coord, c4: Coord):
-        self.tokens: list[Coord] = [c1, c2, c3, c4]
+        self.tokens: tuple[Coord, Coord, Coord, Coord] = (c1, c2, c3, c4)
+        self.mask: int = coords_mask(self.tokens)
+        self.placement_id: int = placement_id_from_mask(self.mask)
+        # Cells orthogonally adjacent to the tokens, excluding the tokens themselves
+        self.adj_coords: tuple[Coord, ...] = tuple(mask_coords(PLACEMENTS[self.placement_id].adj_mask))
 
     def create_action(self) -> Action:
         return Action(*self.tokens)
     
     def __hash__(self) -> int:
-        return hash(tuple(self.tokens))
+        return self.placement_id
     
     def __eq__(self, other: 'Tetromino') -> bool:
-        return self.tokens == other.tokens
+        # Identity is the unordered set of cells covered, so the order of the tokens is irrelevant
+        return isinstance(other, Tetromino) and self.placement_id == other.placement_id
     
     def __str__(self) -> str:
-        return str(self.tokens)
+        return str(list(self.tokens))
     
     def __repr__(self) -> str:
         return self.__str__()
     
-    def all_adj_coords(self) -> list[Coord]:
-        adj_coords: set[Coord] = set()
-        tetromino_coords: set[Coord] = set(self.tokens)
-
-        for token in self.tokens:
-            for adj_coord in filter(lambda adj_coord_: adj_coord_ not in tetromino_coords, coord_adjacents(token)):
-                adj_coords.add(adj_coord)
+    def all_adj_coords(self) -> tuple[Coord, ...]:
+        return self.adj_coords
 
-        return list(adj_coords)
+    @staticmethod
+    def from_placement(placement_id: int) -> 'Tetromino':
+        return _PLACEMENT_TETROMINOS[placement_id]
 
     @staticmethod
     def all_tetrominos_at(at: Coord) -> list['Tetromino']:
-        return [Tetromino(*[at + coord for coord in piece]) for piece in _TEMPLATES.values()]
+        return [_PLACEMENT_TETROMINOS[placement_id] for placement_id in placements_at(coord_index(at))]
     
     @staticmethod
     def tetromino_from_action(action: Action) -> 'Tetromino':
-        return Tetromino(*action.coords)
+        return _PLACEMENT_TETROMINOS[placement_id_from_mask(coords_mask(action.coords))]
+
+_PLACEMENT_TETROMINOS: list[Tetromino] = [Tetromino(*placement.coords) for placement in PLACEMENTS]
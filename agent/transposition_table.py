@@ -0,0 +1,98 @@
+from enum import Enum
+from multiprocessing.shared_memory import SharedMemory
+
+class BoundType(Enum):
+    EXACT = 1
+    LOWER = 2
+    UPPER = 3
+
+# (key, depth, bound type, value, best placement id)
+TTEntry = tuple[int, int, BoundType, float, int | None]
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results, indexed by the low bits of a position's Zobrist key. A different position always
+    replaces an entry, while a result for the same position only replaces one searched to at most the same depth.
+    """
+    def __init__(self, size_bits: int = 18):
+        self.size: int = 1 << size_bits
+        self.entries: list[TTEntry | None] = [None] * self.size
+
+    def probe(self, key: int) -> TTEntry | None:
+        entry: TTEntry | None = self.entries[key & (self.size - 1)]
+        return entry if entry != None and entry[0] == key else None
+
+    def store(self, key: int, depth: int, bound_type: BoundType, value: float, best_placement_id: int | None) -> None:
+        index: int = key & (self.size - 1)
+        entry: TTEntry | None = self.entries[index]
+
+        if entry == None or entry[0] != key or depth >= entry[1]:
+            self.entries[index] = (key, depth, bound_type, value, best_placement_id)
+
+    def clear(self) -> None:
+        self.entries = [None] * self.size
+
+# Shared entries are two 64 bit words: the key XOR the data, then the data, which packs a 32 bit value offset by VALUE_OFFSET,
+# an 8 bit depth and bound type, and a 16 bit best placement id
+KEY_MASK: int = (1 << 64) - 1
+VALUE_OFFSET: int = 1 << 31
+MAX_VALUE: int = (1 << 32) - 1
+NO_PLACEMENT: int = (1 << 16) - 1
+
+class SharedTranspositionTable:
+    """
+    Transposition table in shared memory, which processes of a parallel search read and write concurrently without locks.
+    The key of each entry is stored XORed with its data, so an entry torn by concurrent writes fails the key check and is
+    treated as missing. Values must be integers or infinite. Entries are replaced as in TranspositionTable.
+    """
+    def __init__(self, size_bits: int = 18, name: str | None = None):
+        self.size: int = 1 << size_bits
+        # The table is created by the process passing no name, which owns it, and attached to by name in the others
+        self.owner: bool = name == None
+        self.shared_memory: SharedMemory = SharedMemory(name, create=self.owner, size=self.size * 16)
+        self.words: memoryview = self.shared_memory.buf.cast("Q")
+        if self.owner:
+            self.clear()
+
+    @property
+    def name(self) -> str:
+        return self.shared_memory.name
+
+    def probe(self, key: int) -> TTEntry | None:
+        index: int = (key & (self.size - 1)) << 1
+        data: int = self.words[index + 1]
+        if self.words[index] ^ data != key & KEY_MASK:
+            return None
+
+        value: float = data & MAX_VALUE
+        value = float('inf') if value == MAX_VALUE else float('-inf') if value == 0 else value - VALUE_OFFSET
+        best_placement_id: int | None = data >> 48
+        if best_placement_id == NO_PLACEMENT:
+            best_placement_id = None
+
+        return (key, (data >> 32) & 0xFF, BoundType((data >> 40) & 0xFF), value, best_placement_id)
+
+    def store(self, key: int, depth: int, bound_type: BoundType, value: float, best_placement_id: int | None) -> None:
+        entry: TTEntry | None = self.probe(key)
+        if entry != None and depth < entry[1]:
+            return
+
+        packed_value: int = MAX_VALUE if value == float('inf') else 0 if value == float('-inf') else int(value) + VALUE_OFFSET
+        data: int = packed_value | min(depth, 0xFF) << 32 | bound_type.value << 40 | (NO_PLACEMENT if best_placement_id == None else best_placement_id) << 48
+
+        index: int = (key & (self.size - 1)) << 1
+        self.words[index] = (key & KEY_MASK) ^ data
+        self.words[index + 1] = data
+
+    def clear(self) -> None:
+        # An all zero entry only matches key 0, whose data is invalid, so the table is effectively empty
+        self.words[:] = memoryview(bytes(self.size * 16)).cast("Q")
+
+    def close(self) -> None:
+        """
+        Detaches this process from the table, which the owner also frees.
+        """
+        self.words.release()
+        self.shared_memory.close()
+        if self.owner:
+            self.shared_memory.unlink()
@@ -0,0 +1,30 @@
+import random
+from referee.game.player import PlayerColor
+from referee.game.constants import MAX_TURNS
+from .bitboard import NUM_CELLS, mask_indices
+from .placements import PLACEMENTS
+
+# Fixed seed, so that hashes are reproducible between runs and processes
+_rng: random.Random = random.Random(30024)
+
+CELL_KEYS: dict[PlayerColor, list[int]] = {player: [_rng.getrandbits(64) for _ in range(NUM_CELLS)] for player in PlayerColor}
+# Search may probe a little past the turn limit, so keys are generated with some margin
+TURN_KEYS: list[int] = [_rng.getrandbits(64) for _ in range(2 * MAX_TURNS)]
+PLAYER_TO_MOVE_KEYS: dict[PlayerColor, int] = {player: _rng.getrandbits(64) for player in PlayerColor}
+
+def mask_hash(mask: int, player: PlayerColor) -> int:
+    cell_keys: list[int] = CELL_KEYS[player]
+    mask_hash_: int = 0
+    for cell_index in mask_indices(mask):
+        mask_hash_ ^= cell_keys[cell_index]
+
+    return mask_hash_
+
+PLACEMENT_KEYS: dict[PlayerColor, list[int]] = {player: [mask_hash(placement.mask, player) for placement in PLACEMENTS] for player in PlayerColor}
+
+def position_hash(player_boards: dict[PlayerColor, int], turn_count: int) -> int:
+    position_hash_: int = TURN_KEYS[turn_count]
+    for player, player_board in player_boards.items():
+        position_hash_ ^= mask_hash(player_board, player)
+
+    return position_hash_
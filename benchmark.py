@@ -0,0 +1,311 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part B: Benchmarks for the agent's search
+
+import argparse
+import contextlib
+import io
+import math
+import random
+import time
+from referee.game import PlayerColor
+from referee.game.board import Board
+from referee.game.coord import Coord
+from referee.game.pieces import _TEMPLATES
+from agent.t_board import TBoard, PlacementUndo
+from agent.tetromino import Tetromino
+from agent.placements import PLACEMENTS
+from agent.bitboard import adjacent_mask, coord_mask, coords_mask
+from agent.misc import all_board_coords
+from agent.search_context import SearchContext, SearchAlgorithm
+from agent.search_stats import SearchStats
+from agent.transposition_table import TranspositionTable
+from agent.move_history import MoveHistory
+from agent.iterative_deepening import iterative_deepening
+from agent.best_next_move import best_next_move
+from agent.batch_evaluation import BATCH_EVALUATION_AVAILABLE, child_scores
+from agent.program import Agent, SearchEngine
+from agent.parallel_search import ParallelRootSearch
+
+def sample_positions(num_positions: int, plies: list[int], seed: int) -> list[tuple[TBoard, PlayerColor]]:
+    """
+    Creates positions by playing uniformly random moves from an empty board, returning each position along with the player
+    to move.
+    """
+    rng: random.Random = random.Random(seed)
+    positions: list[tuple[TBoard, PlayerColor]] = []
+
+    for i in range(num_positions):
+        t_board: TBoard = TBoard()
+        player: PlayerColor = PlayerColor.RED
+
+        for _ in range(plies[i % len(plies)]):
+            if t_board.turn_count <= 1:
+                moves: list[int] = [placement.id for placement in PLACEMENTS if not t_board.occupied & placement.mask]
+            else:
+                moves = sorted(t_board.player_playable_tetrominos[player])
+            if not moves:
+                break
+
+            t_board.place_tetromino_in_place(Tetromino.from_placement(rng.choice(moves)), player)
+            player = player.opponent
+
+        positions.append((t_board, player))
+
+    return positions
+
+def anchored_tetrominos(t_board: TBoard, player: PlayerColor) -> list[tuple[Coord, ...]]:
+    """
+    Playable tetrominos of the player as the original move generator produced them, translating every template to every
+    empty cell and keeping those which fit and neighbour the player's tokens, each as its ordered list of tokens.
+    """
+    occupied: int = t_board.occupied
+    player_adj: int = adjacent_mask(t_board.player_boards[player])
+    tetrominos: list[tuple[Coord, ...]] = []
+
+    for anchor in all_board_coords():
+        if occupied & coord_mask(anchor):
+            continue
+
+        for template in _TEMPLATES.values():
+            tokens: tuple[Coord, ...] = tuple(anchor + offset for offset in template)
+            mask: int = coords_mask(list(tokens))
+            if not occupied & mask and mask & player_adj:
+                tetrominos.append(tokens)
+
+    return tetrominos
+
+def branching(args: argparse.Namespace) -> None:
+    """
+    Reports the branching factor at each sample position, counting the moves of the original generator by ordered token
+    list (the previous Tetromino identity) and the moves of the placement table by the set of cells covered (the current
+    identity).
+    """
+    total_ordered, total_canonical = 0, 0
+
+    for t_board, player in sample_positions(args.positions, args.plies, args.seed):
+        num_ordered: int = len(set(anchored_tetrominos(t_board, player)))
+        num_canonical: int = t_board.num_playable_tetrorminos(player)
+        total_ordered, total_canonical = total_ordered + num_ordered, total_canonical + num_canonical
+
+        print(f"turn {t_board.turn_count:3d}: {num_ordered:4d} ordered, {num_canonical:4d} canonical")
+
+    print(f"mean branching factor: {total_ordered / args.positions:.1f} ordered, {total_canonical / args.positions:.1f} canonical")
+
+def search(args: argparse.Namespace) -> None:
+    """
+    Runs an iterative deepening search to the same fixed depth with each search algorithm, on the same sample positions,
+    reporting the nodes searched and time taken.
+    """
+    positions: list[tuple[TBoard, PlayerColor]] = sample_positions(args.positions, args.plies, args.seed)
+
+    for algorithm in SearchAlgorithm:
+        total_nodes, total_time = 0, 0.0
+        utilities: list[float] = []
+
+        for t_board, player in positions:
+            context: SearchContext = SearchContext(
+                TranspositionTable(),
+                stats=SearchStats(),
+                move_history=MoveHistory(),
+                algorithm=algorithm,
+                late_move_reductions=args.late_move_reductions,
+                null_move_pruning=args.null_move_pruning,
+                batch_evaluation=not args.no_batch_evaluation,
+                territory_evaluation=args.territory_evaluation,
+                threat_extensions=args.threat_extensions,
+                quiescence=args.quiescence,
+            )
+            start_time: float = time.process_time()
+            utility, _, _ = iterative_deepening(t_board, player, context, float('inf'), max_depth=args.depth)
+
+            total_time += time.process_time() - start_time
+            total_nodes += context.stats.nodes
+            utilities.append(utility)
+
+        print(f"{algorithm.name}: {total_nodes} nodes, {total_time:.2f}s, utilities {utilities}")
+
+def first_moves_lose(t_board: TBoard, player: PlayerColor, num_moves: int, depth: int) -> bool:
+    """
+    Whether the player loses after each of the first moves in the search's static ordering, searched to one less than the
+    given depth.
+    """
+    tetrominos: list[Tetromino] = t_board.playable_tetrominos(player, sort=True, remove_equivalent=True)
+    if len(tetrominos) <= num_moves:
+        return False
+
+    for tetromino in tetrominos[:num_moves]:
+        undo: PlacementUndo = t_board.apply(tetromino, player)
+        utility, _ = best_next_move(t_board, player.opponent, player, float('-inf'), float('inf'), depth - 1, SearchContext(batch_evaluation=False))
+        t_board.undo(undo)
+        if utility != float('-inf'):
+            return False
+
+    return True
+
+def soundness(args: argparse.Namespace) -> None:
+    """
+    Compares the utility found at each sample position where the first moves searched lose with plain minimax's, as null
+    window probes are only sound at finite bounds. Principal variation search must find the same utility. Late move
+    reductions may misjudge a move by searching it shallower, but must not report the game as decided where minimax does not.
+    """
+    positions: list[tuple[TBoard, PlayerColor]] = [
+        (t_board, player) for t_board, player in sample_positions(args.positions, args.plies, args.seed)
+        if first_moves_lose(t_board, player, args.losing_moves, args.depth)
+    ]
+    mismatches: dict[str, int] = {"principal variation": 0, "late move reductions": 0}
+
+    for t_board, player in positions:
+        expected, _ = best_next_move(t_board, player, player, float('-inf'), float('inf'), args.depth, SearchContext(batch_evaluation=False))
+
+        context: SearchContext = SearchContext(TranspositionTable(), move_history=MoveHistory(), algorithm=SearchAlgorithm.PRINCIPAL_VARIATION)
+        pvs_utility, _ = best_next_move(t_board, player, player, float('-inf'), float('inf'), args.depth, context)
+        mismatches["principal variation"] += pvs_utility != expected
+
+        context = SearchContext(TranspositionTable(), move_history=MoveHistory(), late_move_reductions=True)
+        lmr_utility, _ = best_next_move(t_board, player, player, float('-inf'), float('inf'), args.depth, context)
+        mismatches["late move reductions"] += math.isinf(lmr_utility) and lmr_utility != expected
+
+        print(f"turn {t_board.turn_count:3d}: minimax {expected}, principal variation {pvs_utility}, late move reductions {lmr_utility}")
+
+    print(f"{len(positions)} positions, mismatches {mismatches}")
+
+def batch(args: argparse.Namespace) -> None:
+    """
+    Compares the utility the batch evaluation gives every child of each sample position with the utility the search scores
+    the child with one at a time, from TBoard.player_score.
+    """
+    if not BATCH_EVALUATION_AVAILABLE:
+        print("NumPy is not installed, so batch evaluation is unavailable")
+        return
+
+    num_children, mismatches = 0, 0
+
+    for t_board, player in sample_positions(args.positions, args.plies, args.seed):
+        if not t_board.num_playable_tetrorminos(player):
+            continue
+
+        placement_ids, scores = child_scores(t_board, player, player)
+        for placement_id, score in zip(placement_ids.tolist(), scores.tolist()):
+            undo: PlacementUndo = t_board.apply(Tetromino.from_placement(placement_id), player)
+            expected, _ = best_next_move(t_board, player.opponent, player, float('-inf'), float('inf'), 0)
+            t_board.undo(undo)
+
+            num_children += 1
+            if score != expected:
+                mismatches += 1
+                print(f"turn {t_board.turn_count:3d}, placement {placement_id}: batch {score}, scalar {expected}")
+
+    print(f"{num_children} children, {mismatches} mismatches")
+
+def parallel(args: argparse.Namespace) -> None:
+    """
+    Runs the parallel root search with each number of workers on the same sample positions, reporting the depth reached, the
+    wall time taken, the process time of the main process, which is all the referee's timer charges, and the process time of
+    the workers, which it does not see.
+    """
+    positions: list[tuple[TBoard, PlayerColor]] = sample_positions(args.positions, args.plies, args.seed)
+
+    for num_workers in args.workers:
+        parallel_search: ParallelRootSearch = ParallelRootSearch(num_workers, late_move_reductions=True, null_move_pruning=True)
+        total_depth, total_wall_time, total_charged_time, total_worker_time = 0, 0.0, 0.0, 0.0
+
+        for t_board, player in positions:
+            start_time, start_wall_time = time.process_time(), time.perf_counter()
+            _, _, depth = parallel_search.search(t_board, player, args.time)
+
+            total_charged_time += time.process_time() - start_time
+            total_wall_time += time.perf_counter() - start_wall_time
+            total_worker_time += parallel_search.worker_time
+            total_depth += depth
+
+        parallel_search.close()
+        print(
+            f"{num_workers} workers: mean depth {total_depth / len(positions):.2f}, wall {total_wall_time:.2f}s, "
+            f"charged {total_charged_time:.2f}s, workers {total_worker_time:.2f}s"
+        )
+
+def play_game(engines: dict[PlayerColor, SearchEngine], time_limit: float) -> tuple[PlayerColor | None, int]:
+    """
+    Plays a game between agents using the given engines, with the same process time limit for each, returning the winner
+    and the number of turns played.
+    """
+    board: Board = Board()
+    # The agents print progress for the referee's logs, which is of no use here
+    with contextlib.redirect_stdout(io.StringIO()):
+        agents: dict[PlayerColor, Agent] = {player: Agent(player, search_engine=engine) for player, engine in engines.items()}
+        time_used: dict[PlayerColor, float] = {player: 0.0 for player in engines}
+
+        while not board.game_over:
+            player: PlayerColor = board.turn_color
+            start_time: float = time.process_time()
+            action = agents[player].action(time_remaining=time_limit - time_used[player], space_remaining=None)
+            time_used[player] += time.process_time() - start_time
+
+            if time_used[player] > time_limit:
+                return player.opponent, board.turn_count
+
+            board.apply_action(action)
+            for agent in agents.values():
+                agent.update(player, action)
+
+    return board.winner_color, board.turn_count
+
+def match(args: argparse.Namespace) -> None:
+    """
+    Plays games between the alpha-beta and Monte Carlo engines under identical clocks, alternating colours, and reports
+    each engine's wins.
+    """
+    wins: dict[SearchEngine | None, int] = {SearchEngine.ALPHA_BETA: 0, SearchEngine.MONTE_CARLO: 0, None: 0}
+
+    for game in range(args.games):
+        engines: dict[PlayerColor, SearchEngine] = {PlayerColor.RED: SearchEngine.ALPHA_BETA, PlayerColor.BLUE: SearchEngine.MONTE_CARLO}
+        if game % 2:
+            engines = {player: engines[player.opponent] for player in engines}
+
+        winner, turns = play_game(engines, args.time)
+        wins[engines[winner] if winner != None else None] += 1
+        print(f"game {game}: RED {engines[PlayerColor.RED].name}, BLUE {engines[PlayerColor.BLUE].name}, winner {engines[winner].name if winner != None else 'draw'} after {turns} turns")
+
+    print(f"{SearchEngine.ALPHA_BETA.name} {wins[SearchEngine.ALPHA_BETA]}, {SearchEngine.MONTE_CARLO.name} {wins[SearchEngine.MONTE_CARLO]}, draws {wins[None]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the agent's search.")
+    parser.add_argument("--positions", type=int, default=10, help="number of sample positions")
+    parser.add_argument("--plies", type=int, nargs="+", default=[6, 12, 20, 30], help="random plies played to create each position")
+    parser.add_argument("--seed", type=int, default=0)
+
+    benchmarks = parser.add_subparsers(dest="benchmark", required=True)
+    benchmarks.add_parser("branching", help="branching factor under each tetromino identity").set_defaults(run=branching)
+
+    search_parser = benchmarks.add_parser("search", help="nodes and time of each search algorithm at a fixed depth")
+    search_parser.add_argument("--depth", type=int, default=4)
+    search_parser.add_argument("--late-move-reductions", action="store_true")
+    search_parser.add_argument("--null-move-pruning", action="store_true")
+    search_parser.add_argument("--no-batch-evaluation", action="store_true")
+    search_parser.add_argument("--territory-evaluation", action="store_true")
+    search_parser.add_argument("--threat-extensions", action="store_true")
+    search_parser.add_argument("--quiescence", action="store_true")
+    search_parser.set_defaults(run=search)
+
+    soundness_parser = benchmarks.add_parser("soundness", help="utilities of the search against minimax where the first moves lose")
+    soundness_parser.add_argument("--depth", type=int, default=3)
+    soundness_parser.add_argument("--losing-moves", type=int, default=1, help="number of first moves in the ordering which must lose")
+    soundness_parser.set_defaults(run=soundness)
+
+    benchmarks.add_parser("batch", help="batch evaluation of children against the scalar evaluation").set_defaults(run=batch)
+
+    parallel_parser = benchmarks.add_parser("parallel", help="depth and time accounting of the parallel root search")
+    parallel_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parallel_parser.add_argument("--time", type=float, default=1, help="time budget of each search, in seconds")
+    parallel_parser.set_defaults(run=parallel)
+
+    match_parser = benchmarks.add_parser("match", help="games between the search engines under identical clocks")
+    match_parser.add_argument("--games", type=int, default=2)
+    match_parser.add_argument("--time", type=float, default=180, help="process time limit of each player per game, in seconds")
+    match_parser.set_defaults(run=match)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -85,14 +85,15 @@ class Direction(Enum):
             Direction.Right: "[→]",
         }[self]
 
-    def __getattribute__(self, __name: str) -> int:
-        match __name:
-            case "r":
-                return self.value.r
-            case "c":
-                return self.value.c
-            case _:
-                return super().__getattribute__(__name)
+    # Plain properties rather than an overridden __getattribute__, which
+    # slowed down every attribute access on a direction
+    @property
+    def r(self) -> int:
+        return self._value_.r
+
+    @property
+    def c(self) -> int:
+        return self._value_.c
 
 
 @dataclass(order=True, frozen=True)
@@ -112,13 +113,21 @@ class Coord(Vector2):
         return f"{self.r}-{self.c}"
 
     def __add__(self, other: 'Direction|Vector2') -> 'Coord':
-        return self.__class__(
-            (self.r + other.r) % BOARD_N, 
-            (self.c + other.c) % BOARD_N,
-        )
+        return _COORD_POOL[
+            (self.r + other.r) % BOARD_N * BOARD_N
+            + (self.c + other.c) % BOARD_N
+        ]
 
     def __sub__(self, other: 'Direction|Vector2') -> 'Coord':
-        return self.__class__(
-            (self.r - other.r) % BOARD_N, 
-            (self.c - other.c) % BOARD_N
-        )
+        return _COORD_POOL[
+            (self.r - other.r) % BOARD_N * BOARD_N
+            + (self.c - other.c) % BOARD_N
+        ]
+
+
+# Every coordinate on the board, indexed by r * BOARD_N + c. Arithmetic on
+# coordinates returns these instances, as the results are always in bounds
+# and need not be constructed and validated again.
+_COORD_POOL: list[Coord] = [
+    Coord(r, c) for r in range(BOARD_N) for c in range(BOARD_N)
+]